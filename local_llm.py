@@ -5,6 +5,7 @@ import sys
 import time
 import threading
 import random
+from concurrent.futures import Future, ThreadPoolExecutor
 
 import httpx
 
@@ -21,9 +22,24 @@ LLM_FIRST_ATTEMPT_TIMEOUT = float(
 LLM_CLIENT_TIMEOUT = float(os.getenv("LLM_CLIENT_TIMEOUT", "300.0"))  # 5 minutes
 # Simple prompt to use for preloading model
 LLM_PRELOAD_PROMPT = os.getenv("LLM_PRELOAD_PROMPT", "Hello, world!")
+# How long Ollama keeps a model loaded after its last request (its keep_alive)
+LLM_KEEP_ALIVE_SECONDS = float(os.getenv("LLM_KEEP_ALIVE_SECONDS", "300"))
 
 _CACHE: dict[str, str] = {}
 _CACHE_LOCK = threading.Lock()
+# Shared by all calls so connections to Ollama are kept alive and reused;
+# timeouts are passed per request
+_HTTP_CLIENT = httpx.Client()
+# Cleared while a preload runs; llm_call waits on it so work queued behind a
+# preload can prepare its prompts without racing the model load
+_PRELOAD_IDLE = threading.Event()
+_PRELOAD_IDLE.set()
+_PRELOAD_LOCK = threading.Lock()
+# Preloads get a thread of their own, so one never waits behind summary tasks
+# while the calls it holds back sit blocked on _PRELOAD_IDLE
+_PRELOAD_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="preload")
+# time.monotonic() of Ollama's last successful response, while the model is warm
+_LAST_RESPONSE_AT: float | None = None
 
 
 # ------------------ helpers ------------------
@@ -46,6 +62,12 @@ def llm_call(prompt: str, file_path: str | None = None) -> str:
 
     file_info = f" for file '{file_path}'" if file_path else ""
 
+    if not _PRELOAD_IDLE.wait(timeout=LLM_FIRST_ATTEMPT_TIMEOUT):
+        print(
+            f"Warning: Model preload still running after {LLM_FIRST_ATTEMPT_TIMEOUT:.0f}s{file_info}; calling Ollama anyway.",
+            file=sys.stderr,
+        )
+
     for attempt in range(LLM_MAX_RETRIES):
         try:
             prompt_snippet = prompt[:50].replace("\n", " ").replace("'", "\\'")
@@ -61,23 +83,23 @@ def llm_call(prompt: str, file_path: str | None = None) -> str:
                 f"[Thread-{thread_id}] Using timeout of {timeout:.1f} seconds for attempt {attempt + 1}{file_info}",
                 file=sys.stderr,
             )
-            with httpx.Client(timeout=timeout) as client:
-                resp = client.post(OLLAMA_URL, json=payload)
-                resp.raise_for_status()  # Raises HTTPStatusError for 4xx/5xx responses
-                response_json = resp.json()
-                response_text = response_json.get("response", "").strip()
-                if not response_text and "error" in response_json:
-                    response_text = (
-                        f"Error: Ollama returned an error - {response_json['error']}"
-                    )
-                elif not response_text:
-                    response_text = (
-                        "Error: Ollama returned empty response with no error message."
-                    )
+            resp = _HTTP_CLIENT.post(OLLAMA_URL, json=payload, timeout=timeout)
+            resp.raise_for_status()  # Raises HTTPStatusError for 4xx/5xx responses
+            response_json = resp.json()
+            response_text = response_json.get("response", "").strip()
+            if not response_text and "error" in response_json:
+                response_text = (
+                    f"Error: Ollama returned an error - {response_json['error']}"
+                )
+            elif not response_text:
+                response_text = (
+                    "Error: Ollama returned empty response with no error message."
+                )
 
-                # Successful call, break retry loop
-                last_error = None  # Clear the error tracker on success
-                break
+            _mark_model_warm()
+            # Successful call, break retry loop
+            last_error = None  # Clear the error tracker on success
+            break
 
         except httpx.TimeoutException as e:
             last_error = e
@@ -195,14 +217,58 @@ def llm_call(prompt: str, file_path: str | None = None) -> str:
     return response_text
 
 
+def _mark_model_warm() -> None:
+    global _LAST_RESPONSE_AT
+    _LAST_RESPONSE_AT = time.monotonic()
+
+
+def _model_is_warm() -> bool:
+    last = _LAST_RESPONSE_AT
+    return last is not None and time.monotonic() - last < LLM_KEEP_ALIVE_SECONDS
+
+
+def start_preload() -> Future | None:
+    """Preload the model in the background, unless there is no need to.
+
+    The idle event is cleared here, on the caller's thread, and the preload
+    starts at once on its own thread, so llm_call calls made after this
+    returns wait only for the load itself. Returns the preload's future, or
+    None when a preload is already running or the model is still warm.
+    """
+    with _PRELOAD_LOCK:
+        if not _PRELOAD_IDLE.is_set() or _model_is_warm():
+            return None
+        _PRELOAD_IDLE.clear()
+    try:
+        return _PRELOAD_EXECUTOR.submit(_run_preload)
+    except Exception:
+        _PRELOAD_IDLE.set()
+        raise
+
+
+def _run_preload() -> bool:
+    try:
+        return _preload_model()
+    finally:
+        _PRELOAD_IDLE.set()
+
+
 def preload_model() -> bool:
     """
     Preload the model before starting any processing.
     This ensures the model is loaded into memory before parallel processing begins.
+    llm_call waits while a preload is running; use start_preload() to run one
+    in the background instead of blocking on it.
 
     Returns:
         bool: True if preloading succeeded, False otherwise
     """
+    with _PRELOAD_LOCK:
+        _PRELOAD_IDLE.clear()
+    return _run_preload()
+
+
+def _preload_model() -> bool:
     print(f"Preloading model {MODEL_TAG}...", file=sys.stderr)
 
     max_preload_attempts = 3
@@ -219,12 +285,14 @@ def preload_model() -> bool:
                 f"Preload attempt {attempt+1}/{max_preload_attempts}", file=sys.stderr
             )
             # Use a very long timeout for preloading
-            with httpx.Client(timeout=LLM_FIRST_ATTEMPT_TIMEOUT) as client:
-                resp = client.post(OLLAMA_URL, json=payload)
-                resp.raise_for_status()
+            resp = _HTTP_CLIENT.post(
+                OLLAMA_URL, json=payload, timeout=LLM_FIRST_ATTEMPT_TIMEOUT
+            )
+            resp.raise_for_status()
 
-                print(f"Model {MODEL_TAG} successfully preloaded!", file=sys.stderr)
-                return True
+            _mark_model_warm()
+            print(f"Model {MODEL_TAG} successfully preloaded!", file=sys.stderr)
+            return True
 
         except httpx.HTTPStatusError as e:
             # Specifically handle 500 errors which might indicate model loading issues
@@ -4,12 +4,18 @@ import argparse
 import ast
 import hashlib
 import os
+import queue
 import re
+import shutil
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
 from typing import Iterable
 import sys
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from threading import Lock
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import lru_cache
+from threading import Lock, RLock
 import fnmatch  # Added import
 import datetime  # Added for timestamps
 
@@ -40,6 +46,9 @@ AVG_CHARS_PER_TOKEN_CODE = 3  # e.g., 1 token ~ 3 characters for code
 CPU_COUNT = os.cpu_count() or 1  # Ensure CPU_COUNT is at least 1
 LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
 LLM_RETRY_DELAY = int(os.getenv("LLM_RETRY_DELAY", "5"))  # seconds
+README_WRITE_COALESCE_SECONDS = 0.1  # Batching window for README updates
+TOKEN_COUNT_BATCH_SIZE = 64  # Files decoded and encoded per batch encoder call
+READ_MAX_WORKERS = 32  # Concurrent file reads; opens are latency-bound, not CPU-bound
 
 # --- New exclusion lists definitions ---
 DEFAULT_EXCLUDE_DIR_ITEMS_STR = (
@@ -73,9 +82,11 @@ def get_timestamp():
     return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
 
-def log_message(message, file=sys.stderr):
+def log_message(message, file=None):
     """Print a message with a timestamp prefix"""
-    print(f"[{get_timestamp()}] {message}", file=file)
+    # Look stderr up per call so a caller's redirect (the web app's log
+    # capture) also sees messages from the shared helpers here
+    print(f"[{get_timestamp()}] {message}", file=file or sys.stderr)
 
 
 def _resolve_exclusions(env_var_name: str, default_str_value: str) -> set[str]:
@@ -128,42 +139,157 @@ INCLUDE_EXTS = {
 MARKER_TPL = ("<!-- BEGIN summary: {fname} -->", "<!-- END summary: {fname} -->")
 _CACHE: dict[str, str] = {}
 _CACHE_LOCK = Lock()
-_README_LOCKS: dict[Path, Lock] = {}
+_README_LOCKS: dict[Path, RLock] = {}
 _README_LOCKS_ACCESS_LOCK = Lock()  # To protect access to _README_LOCKS dictionary
-_TOKEN_ENCODING: tiktoken.Encoding | None = None  # Added for token counting
-_TOTAL_TOKEN_COUNT: int = 0  # Added for token counting
-_TOKEN_COUNT_LOCK = Lock()  # Added for token counting
 
 # ------------------ helpers ------------------
 
 
+@lru_cache(maxsize=1)
+def _get_encoding() -> tiktoken.Encoding:
+    """Load cl100k_base once per process; a failed load is not cached."""
+    return tiktoken.get_encoding("cl100k_base")
+
+
+def get_token_encoding() -> tiktoken.Encoding | None:
+    """Return the shared token encoding, or None if it cannot be loaded."""
+    try:
+        return _get_encoding()
+    except Exception as e:
+        log_message(
+            f"Warning: Could not initialize tiktoken encoding. Token counting will be skipped. Error: {e}"
+        )
+        return None
+
+
+def _read_text(p: Path) -> str | Exception:
+    """Read p as UTF-8 (errors ignored), returning the exception if that fails."""
+    try:
+        return p.read_bytes().decode("utf-8", errors="ignore")
+    except Exception as e:
+        return e
+
+
+def _count_tokens_in_batches(
+    encoding: tiktoken.Encoding, paths: list[Path]
+) -> Iterable[list[tuple[Path, int]]]:
+    """Yield (path, token count) pairs, one list per batch of files.
+
+    Files are read as bytes and decoded once, with the reads for every batch
+    overlapped on one shared thread pool. encode_ordinary_batch runs
+    tiktoken's Rust encoder on CPU_COUNT threads with the GIL released, and
+    unlike encode_batch(disallowed_special=()) it skips the special-token
+    scan while giving the same tokens. Unreadable files are logged and left out.
+    """
+    readers = None
+    if len(paths) > 1:
+        readers = ThreadPoolExecutor(
+            max_workers=min(READ_MAX_WORKERS, TOKEN_COUNT_BATCH_SIZE, len(paths))
+        )
+    read = readers.map if readers is not None else map
+    try:
+        for start in range(0, len(paths), TOKEN_COUNT_BATCH_SIZE):
+            batch_paths = []
+            texts = []
+            chunk = paths[start : start + TOKEN_COUNT_BATCH_SIZE]
+            for p, text in zip(chunk, read(_read_text, chunk)):
+                if isinstance(text, Exception):
+                    log_message(
+                        f"Warning: Could not count tokens for {p}. Error: {text}"
+                    )
+                    continue
+                texts.append(text)
+                batch_paths.append(p)
+            try:
+                token_lists = encoding.encode_ordinary_batch(
+                    texts, num_threads=CPU_COUNT
+                )
+            except Exception as e:
+                log_message(
+                    f"Warning: Could not count tokens for a batch of {len(texts)} files. Error: {e}"
+                )
+                continue
+            yield [(p, len(tokens)) for p, tokens in zip(batch_paths, token_lists)]
+    finally:
+        if readers is not None:
+            readers.shutdown(cancel_futures=True)
+
+
+def is_file_name_excluded(name: str, exclude_file_items: set[str]) -> bool:
+    """Checks if a file name matches any of the file exclusion patterns."""
+    for file_item in exclude_file_items:
+        if fnmatch.fnmatch(name, file_item):
+            return True
+    return False
+
+
+def is_dir_name_excluded(name: str, exclude_dir_items: set[str]) -> bool:
+    """Checks if a single directory name matches any of the directory exclusion patterns."""
+    for dir_item in exclude_dir_items:
+        if fnmatch.fnmatch(name, dir_item):
+            return True
+    return False
+
+
+@lru_cache(maxsize=None)
+def _dir_name_excluded(name: str) -> bool:
+    """is_dir_name_excluded against EXCLUDE_DIR_ITEMS, memoized per name.
+
+    Directory names repeat across a tree (src, utils, ...), so each distinct
+    name is matched against the patterns once.
+    """
+    return is_dir_name_excluded(name, EXCLUDE_DIR_ITEMS)
+
+
 def is_path_excluded(
     p: Path, exclude_dir_items: set[str], exclude_file_items: set[str]
 ) -> bool:
     """Checks if a given path should be excluded based on directory and file patterns."""
     # Check against file patterns/names
-    for file_item in exclude_file_items:
-        if fnmatch.fnmatch(p.name, file_item):
-            # log_message(f"DEBUG: Excluding {p} (file item '{file_item}' matches name '{p.name}')")
-            return True
+    if is_file_name_excluded(p.name, exclude_file_items):
+        # log_message(f"DEBUG: Excluding {p} (file name '{p.name}' matches an exclude item)")
+        return True
 
     # Check against directory patterns/names in the parent path components
     for part in p.parent.parts:
         if not part or part == p.anchor:  # Skip empty parts or root anchor
             continue
-        for dir_item in exclude_dir_items:
-            if fnmatch.fnmatch(part, dir_item):
-                # log_message(f"DEBUG: Excluding {p} (dir item '{dir_item}' matches part '{part}')")
-                return True
+        if is_dir_name_excluded(part, exclude_dir_items):
+            # log_message(f"DEBUG: Excluding {p} (dir part '{part}' matches an exclude item)")
+            return True
     return False
 
 
-def _get_readme_lock(readme_path: Path) -> Lock:
+def _iter_unexcluded_files(directory: Path) -> Iterable[Path]:
+    """Yield the files below directory that is_path_excluded would keep.
+
+    Excluded directories are pruned before descending rather than walked and
+    filtered file by file afterwards.
+    """
+    if any(
+        _dir_name_excluded(part)
+        for part in directory.parts
+        if part and part != directory.anchor
+    ):
+        return
+    for dirpath, dirnames, filenames in os.walk(directory):
+        dirnames[:] = [d for d in dirnames if not _dir_name_excluded(d)]
+        for name in filenames:
+            if is_file_name_excluded(name, EXCLUDE_FILE_ITEMS):
+                continue
+            p = Path(dirpath, name)
+            if p.is_file():
+                yield p
+
+
+def _get_readme_lock(readme_path: Path) -> RLock:
     """Gets or creates a lock for a specific README file."""
+    # Lock-free fast path: dict.get is atomic, and entries are never removed
+    lock = _README_LOCKS.get(readme_path)
+    if lock is not None:
+        return lock
     with _README_LOCKS_ACCESS_LOCK:
-        if readme_path not in _README_LOCKS:
-            _README_LOCKS[readme_path] = Lock()
-        return _README_LOCKS[readme_path]
+        return _README_LOCKS.setdefault(readme_path, RLock())
 
 
 def _sha1(text: str) -> str:
@@ -173,12 +299,17 @@ def _sha1(text: str) -> str:
 # ------------------ parsing ------------------
 
 
-def _ast_extract_py_units(path: Path) -> list[tuple[str, str, str | None]]:
-    """Uses Python's AST to extract units (kind, src, name). Name is function/class name or path name for module."""
+def _ast_extract_py_units(
+    path: Path, file_text: str
+) -> list[tuple[str, str, str | None]]:
+    """Uses Python's AST to extract units (kind, src, name). Name is function/class name or path name for module.
+
+    file_text is the file's contents, already read by the caller.
+    """
     src_lines = []
     src_content = ""
     try:
-        src_lines = path.read_text().splitlines()
+        src_lines = file_text.splitlines()
         src_content = "\n".join(src_lines)
         tree = ast.parse(src_content, filename=str(path))
         out: list[tuple[str, str, str | None]] = []
@@ -233,7 +364,7 @@ def _ast_extract_py_units(path: Path) -> list[tuple[str, str, str | None]]:
             file=sys.stderr,
         )
         if not src_content:
-            src_content = path.read_text()
+            src_content = file_text
         return [("python_syntax_error_file", src_content, path.name)]
     except Exception as e:
         print(
@@ -241,10 +372,17 @@ def _ast_extract_py_units(path: Path) -> list[tuple[str, str, str | None]]:
             file=sys.stderr,
         )
         if not src_content:
-            src_content = path.read_text()
+            src_content = file_text
         return [("file", src_content, path.name)]
 
 
+# One unit block in the LLM's response to get_llm_extract_generic_units_prompt
+_GENERIC_UNIT_RE = re.compile(
+    r"--UNIT START--\s*UNIT_KIND:\s*([^\n]+)\s*UNIT_NAME:\s*([^\n]+)\s*UNIT_CODE:\s*```[^\n]*\s*(.*?)\s*```\s*--UNIT END--",
+    re.DOTALL,
+)
+
+
 def _llm_extract_generic_units(
     path: Path, src_content: str, ext: str, llm_mode_choice: str
 ) -> list[tuple[str, str, str | None]]:
@@ -304,11 +442,7 @@ def _llm_extract_generic_units(
 
     # Parse units from text format
     chunks: list[tuple[str, str, str | None]] = []
-    units = re.findall(
-        r"--UNIT START--\s*UNIT_KIND:\s*([^\n]+)\s*UNIT_NAME:\s*([^\n]+)\s*UNIT_CODE:\s*```[^\n]*\s*(.*?)\s*```\s*--UNIT END--",
-        llm_response_str,
-        re.DOTALL,
-    )
+    units = _GENERIC_UNIT_RE.findall(llm_response_str)
 
     for kind, name, code in units:
         kind = kind.strip().lower()
@@ -429,7 +563,7 @@ def extract_code_units(
                 # Fallthrough to normal processing if chunking somehow failed to produce parts
 
         if ext == "py":
-            return _ast_extract_py_units(path)
+            return _ast_extract_py_units(path, src_content)
         elif ext in (
             "js",
             "jsx",
@@ -473,6 +607,22 @@ def extract_code_units(
 # ------------------ summarise ------------------
 
 
+def _batch_prompts(
+    prompts_to_batch: list[str], max_count: int, max_chars: int
+) -> Iterable[list[str]]:
+    """Group prompts in order, at most max_count and (past the first) max_chars each."""
+    batch: list[str] = []
+    batch_chars = 0
+    for prompt in prompts_to_batch:
+        if batch and (len(batch) >= max_count or batch_chars + len(prompt) > max_chars):
+            yield batch
+            batch, batch_chars = [], 0
+        batch.append(prompt)
+        batch_chars += len(prompt)
+    if batch:
+        yield batch
+
+
 def summarise_file(path: Path, llm_mode_choice: str) -> str:
     ext = path.suffix.lstrip(".")
     chunks = extract_code_units(path, ext, llm_mode_choice)  # Pass llm_mode_choice
@@ -483,8 +633,6 @@ def summarise_file(path: Path, llm_mode_choice: str) -> str:
         )
         return ""  # Or a standard message like "Could not process this file."
 
-    blurbs: list[str] = []
-
     # Determine context size and character limits based on LLM mode for snippet generation
     total_model_ctx_tokens = (
         REMOTE_MODEL_TOTAL_CTX_TOKENS
@@ -496,9 +644,13 @@ def summarise_file(path: Path, llm_mode_choice: str) -> str:
         target_input_code_tokens * AVG_CHARS_PER_TOKEN_CODE
     )
 
+    # Uncached unit prompts, keyed by source hash: (prompt, name for logging)
+    pending_prompts: dict[str, tuple[str, str]] = {}
+    chunk_hashes: list[str] = []
     for kind, src, unit_name in chunks:
         h = _sha1(src)
-        if h not in _CACHE:
+        chunk_hashes.append(h)
+        if h not in _CACHE and h not in pending_prompts:
             if kind == "empty_or_comment_only_module" or kind == "empty_file":
                 if (
                     path.name == "__init__.py"
@@ -582,41 +734,57 @@ def summarise_file(path: Path, llm_mode_choice: str) -> str:
                         src_snippet=src_snippet,
                     )
 
-                llm_response_str = ""
-                if llm_mode_choice == "1":
-                    llm_response_str = local_llm.llm_call(prompt_text, str(path))
-                elif llm_mode_choice == "2":
-                    try:
-                        llm_response_str = remote_llm.llm_call_remote(
-                            prompt_text, None, str(path)
-                        )
-                    except ValueError as e:  # Catch API key error
-                        print(
-                            f"ERROR during remote LLM call in summarise_file (unit summary): {e}",
-                            file=sys.stderr,
-                        )
-                        return f"Error: Could not summarize unit due to remote LLM configuration: {e}"
-                else:
-                    print(
-                        f"Warning: Invalid llm_mode_choice '{llm_mode_choice}' in summarise_file (unit). Defaulting to local.",
-                        file=sys.stderr,
-                    )
-                    llm_response_str = local_llm.llm_call(prompt_text, str(path))
-
-                # Use the raw text response as the blurb, no JSON parsing
-                text_blurb_for_rollup = llm_response_str
+                pending_prompts[h] = (prompt_text, name_for_prompt)
 
-                # Log the start of the raw blurb for debugging
-                raw_blurb_snippet_log = (
-                    text_blurb_for_rollup[:100].replace("\n", " ").replace("'", "\\'")
+    if pending_prompts:
+        pending_hashes = list(pending_prompts)
+        llm_responses: list[str] = []
+        if llm_mode_choice == "2":
+            # Unit prompts are short, so per-request overhead dominates; send
+            # several per remote call, bounded like a single snippet
+            try:
+                for batch in _batch_prompts(
+                    [pending_prompts[h][0] for h in pending_hashes],
+                    remote_llm.REMOTE_LLM_BATCH_SIZE,
+                    approx_input_char_limit_for_snippet,
+                ):
+                    llm_responses.extend(
+                        remote_llm.llm_call_remote_batch(batch, None, str(path))
+                    )
+            except ValueError as e:  # Catch API key error
+                print(
+                    f"ERROR during remote LLM call in summarise_file (unit summary): {e}",
+                    file=sys.stderr,
                 )
+                return f"Error: Could not summarize unit due to remote LLM configuration: {e}"
+        else:
+            if llm_mode_choice != "1":
                 print(
-                    f"DEBUG_SUMMARISE_FILE: Using raw LLM text response as blurb for {path.name} ({name_for_prompt}). Blurb starts: '{raw_blurb_snippet_log}...'",
+                    f"Warning: Invalid llm_mode_choice '{llm_mode_choice}' in summarise_file (unit). Defaulting to local.",
                     file=sys.stderr,
                 )
+            for h in pending_hashes:
+                llm_responses.append(
+                    local_llm.llm_call(pending_prompts[h][0], str(path))
+                )
+
+        for h, llm_response_str in zip(pending_hashes, llm_responses):
+            name_for_prompt = pending_prompts[h][1]
+            # Use the raw text response as the blurb, no JSON parsing
+            text_blurb_for_rollup = llm_response_str
 
-                _CACHE[h] = text_blurb_for_rollup
-        blurbs.append(_CACHE[h])
+            # Log the start of the raw blurb for debugging
+            raw_blurb_snippet_log = (
+                text_blurb_for_rollup[:100].replace("\n", " ").replace("'", "\\'")
+            )
+            print(
+                f"DEBUG_SUMMARISE_FILE: Using raw LLM text response as blurb for {path.name} ({name_for_prompt}). Blurb starts: '{raw_blurb_snippet_log}...'",
+                file=sys.stderr,
+            )
+
+            _CACHE[h] = text_blurb_for_rollup
+
+    blurbs = [_CACHE[h] for h in chunk_hashes]
 
     if not blurbs:
         print(
@@ -693,9 +861,10 @@ def summarise_file(path: Path, llm_mode_choice: str) -> str:
 
                 # Read the file content (with reasonable limit)
                 try:
-                    file_content = path.read_text()[
-                        :25000
-                    ]  # Limit to avoid token issues
+                    # Limit to avoid token issues; read(n) stops after n
+                    # characters instead of decoding the whole file
+                    with path.open() as f:
+                        file_content = f.read(25000)
 
                     # Create a direct prompt for the whole file
                     # For retry, we also need to respect token limits for the input snippet.
@@ -771,106 +940,274 @@ def summarise_file(path: Path, llm_mode_choice: str) -> str:
 # ------------------ README injection ------------------
 
 
+# MARKER_TPL = ("<!-- BEGIN summary: {fname} -->", "<!-- END summary: {fname} -->")
+# Regex to find: <!-- BEGIN summary:
+# then capture: anything for fname
+# then find: -->
+# This avoids issues if {fname} in MARKER_TPL[0] has regex special chars.
+_SUMMARY_BEGIN_RE = re.compile(
+    re.escape(MARKER_TPL[0].split("{fname}")[0])
+    + r"(.+?)"
+    + re.escape(MARKER_TPL[0].split("{fname}")[1]),
+    re.S,
+)
+
+
 def _get_summarized_fnames_from_readme(readme_content: str) -> list[str]:
     """Parses README content to find all filenames for which summaries exist."""
-    # MARKER_TPL = ("<!-- BEGIN summary: {fname} -->", "<!-- END summary: {fname} -->")
-    # Regex to find: <!-- BEGIN summary:
-    # then capture: anything for fname
-    # then find: -->
-    # This avoids issues if {fname} in MARKER_TPL[0] has regex special chars.
-    begin_marker_prefix = MARKER_TPL[0].split("{fname}")[0]
-    begin_marker_suffix = MARKER_TPL[0].split("{fname}")[1]
+    return _SUMMARY_BEGIN_RE.findall(readme_content)
+
+
+_EXCESS_NEWLINES_RE = re.compile(r"\n{3,}")
 
+
+def _remove_summaries_from_readme(
+    readme_content: str, fnames_to_remove: Iterable[str]
+) -> str:
+    """Removes the summary blocks for several filenames in one pass over README content."""
+    fnames_to_remove = list(fnames_to_remove)
+    if not fnames_to_remove:
+        return readme_content
+    start_prefix, start_suffix = (re.escape(p) for p in MARKER_TPL[0].split("{fname}"))
+    end_prefix, end_suffix = (re.escape(p) for p in MARKER_TPL[1].split("{fname}"))
+    # One alternation for all names; the END marker must repeat the BEGIN name
     pattern = re.compile(
-        re.escape(begin_marker_prefix) + r"(.+?)" + re.escape(begin_marker_suffix),
+        start_prefix
+        + "(?P<fname>"
+        + "|".join(re.escape(fn) for fn in fnames_to_remove)
+        + ")"
+        + start_suffix
+        + ".*?"
+        + end_prefix
+        + "(?P=fname)"
+        + end_suffix,
         re.S,
     )
-    return pattern.findall(readme_content)
-
-
-def _remove_summary_from_readme(readme_content: str, fname_to_remove: str) -> str:
-    """Removes the summary block for a given filename from README content."""
-    start_marker, end_marker = (tpl.format(fname=fname_to_remove) for tpl in MARKER_TPL)
-    pattern = re.compile(re.escape(start_marker) + r".*?" + re.escape(end_marker), re.S)
-    # Replace the found pattern (including markers) with an empty string.
-    # Add a newline to avoid multiple empty lines if the summary was at the end.
+    # Replace the found blocks (including markers) with an empty string.
     new_content, num_subs = pattern.subn("", readme_content)
     if num_subs > 0:
         # Clean up potential excess newlines that might result from removal
-        new_content = re.sub(r"\\n{3,}", "\\n\\n", new_content).strip()
+        new_content = _EXCESS_NEWLINES_RE.sub("\n\n", new_content).strip()
     return new_content
 
 
-def _inject(readme: Path, fname: str, md: str) -> None:
+def _summary_section(fname: str, md: str) -> tuple[re.Pattern[str], str]:
+    """Pattern matching fname's summary block, and the block for md."""
     start, end = (t.format(fname=fname) for t in MARKER_TPL)
-    md_snippet = md[:50].replace("\n", " ").replace("'", "\\'")  # Clean for printing
-    print(
-        f"DEBUG_INJECT: Called for readme='{readme}', fname='{fname}'. Summary starts: '{md_snippet}...'",
-        file=sys.stderr,
-    )
-    body = ""
+    pattern = re.compile(re.escape(start) + ".*?" + re.escape(end), re.S)
+    return pattern, f"{start}\n## {fname}\n\n{md}\n{end}"
+
+
+def _write_readme_atomically(
+    readme: Path, text: str, encoding: str | None = None
+) -> None:
+    """Replace readme's contents with text; call with readme's lock held.
+
+    Writes beside the README and swaps it in, so readers never see a partial
+    file. A symlinked README keeps its link: the swap replaces the file it
+    points to, and the new file keeps the old one's permissions.
+    """
+    target = readme.resolve()
+    tmp_path = target.with_name(f".{target.name}.{os.getpid()}.tmp")
     try:
-        body = readme.read_text() if readme.exists() else ""
+        tmp_path.write_text(text, encoding=encoding)
+        if target.exists():
+            shutil.copymode(target, tmp_path)
+        os.replace(tmp_path, target)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def _inject_many(readme: Path, entries: list[tuple[str, str]]) -> None:
+    """Inject several (fname, md) summaries with one read and one write of readme.
+
+    Takes readme's lock itself (re-entrant, so callers may already hold it) and
+    only for the read-modify-write; sections are built before acquiring it.
+    """
+    sections = []
+    for fname, md in entries:
+        md_snippet = (
+            md[:50].replace("\n", " ").replace("'", "\\'")
+        )  # Clean for printing
         print(
-            f"DEBUG_INJECT: Read existing body length: {len(body)} for {readme}",
+            f"DEBUG_INJECT: Called for readme='{readme}', fname='{fname}'. Summary starts: '{md_snippet}...'",
             file=sys.stderr,
         )
-    except Exception as e:
-        print(f"ERROR_INJECT: Failed to read {readme}: {e}", file=sys.stderr)
-        # Decide if we should proceed with an empty body or just return
-        body = ""  # Proceed with empty, will try to create/append
+        sections.append((fname, *_summary_section(fname, md)))
 
-    pattern = re.compile(re.escape(start) + ".*?" + re.escape(end), re.S)
-    repl = f"{start}\n## {fname}\n\n{md}\n{end}"
+    replaced_fnames = []
+    appended_fnames = []
+    with _get_readme_lock(readme):
+        body = ""
+        try:
+            body = readme.read_text() if readme.exists() else ""
+            print(
+                f"DEBUG_INJECT: Read existing body length: {len(body)} for {readme}",
+                file=sys.stderr,
+            )
+        except Exception as e:
+            print(f"ERROR_INJECT: Failed to read {readme}: {e}", file=sys.stderr)
+            # Decide if we should proceed with an empty body or just return
+            body = ""  # Proceed with empty, will try to create/append
+
+        new_body = body
+        for fname, pattern, repl in sections:
+            # Callable replacement so backslashes in md are not treated as escapes
+            new_body, num_subs = pattern.subn(lambda _: repl, new_body)
+            if num_subs:
+                replaced_fnames.append(fname)
+            else:
+                # Ensure newline separator if body exists
+                new_body = new_body + ("\n\n" if new_body else "") + repl
+                appended_fnames.append(fname)
 
-    new_body = ""
-    if pattern.search(body):
         print(
-            f"DEBUG_INJECT: Found existing summary for {fname} in {readme}. Replacing.",
+            f"DEBUG_INJECT: Attempting to write new body length: {len(new_body)} to {readme}",
             file=sys.stderr,
         )
-        new_body = pattern.sub(repl, body)
-    else:
+        try:
+            _write_readme_atomically(readme, new_body)
+        except Exception as e:
+            print(f"ERROR_INJECT: Failed to write to {readme}: {e}", file=sys.stderr)
+            return
+
+    for fname in replaced_fnames:
+        print(
+            f"DEBUG_INJECT: Found existing summary for {fname} in {readme}. Replaced.",
+            file=sys.stderr,
+        )
+    for fname in appended_fnames:
         print(
-            f"DEBUG_INJECT: No existing summary for {fname} in {readme}. Appending.",
+            f"DEBUG_INJECT: No existing summary for {fname} in {readme}. Appended.",
             file=sys.stderr,
         )
-        new_body = (
-            body + ("\n\n" if body else "") + repl
-        )  # Ensure newline separator if body exists
+    print(f"DEBUG_INJECT: Successfully wrote to {readme}", file=sys.stderr)
 
-    print(
-        f"DEBUG_INJECT: Attempting to write new body length: {len(new_body)} to {readme}",
-        file=sys.stderr,
+
+def _inject(readme: Path, fname: str, md: str) -> None:
+    _inject_many(readme, [(fname, md)])
+
+
+def _readme_writer_loop(updates: queue.Queue) -> None:
+    """Apply queued (readme_path, fname, md) updates until a None sentinel.
+
+    Updates arriving within README_WRITE_COALESCE_SECONDS of each other are
+    written together, so each README is read and rewritten once per batch
+    rather than once per file.
+    """
+    finished = False
+    while not finished:
+        batch = [updates.get()]
+        # Gather whatever else arrives shortly after the first update
+        deadline = time.monotonic() + README_WRITE_COALESCE_SECONDS
+        while batch[-1] is not None:
+            try:
+                batch.append(updates.get(timeout=max(0.0, deadline - time.monotonic())))
+            except queue.Empty:
+                break
+        entries_by_readme: dict[Path, list[tuple[str, str]]] = {}
+        for update in batch:
+            if update is None:
+                finished = True
+                continue
+            readme_path, fname, md = update
+            entries_by_readme.setdefault(readme_path, []).append((fname, md))
+        for readme_path, entries in entries_by_readme.items():
+            try:
+                _inject_many(readme_path, entries)
+            except Exception as e:
+                log_message(
+                    f"Error writing {len(entries)} summaries to {readme_path}: {e}"
+                )
+
+
+@contextmanager
+def readme_writer():
+    """Yield a queue for README updates, written by a background thread.
+
+    Summarization workers only enqueue (readme_path, fname, md) and never wait
+    on README I/O. All queued updates are on disk once the with block exits.
+    """
+    updates: queue.Queue = queue.Queue()
+    writer = threading.Thread(
+        target=_readme_writer_loop, args=(updates,), name="readme-writer", daemon=True
     )
+    writer.start()
     try:
-        readme.write_text(new_body)
-        print(f"DEBUG_INJECT: Successfully wrote to {readme}", file=sys.stderr)
+        yield updates
+    finally:
+        updates.put(None)
+        writer.join()
+
+
+def _remove_stale_summaries(readme_dir: Path, valid_fnames: set[str]) -> None:
+    """Drop summaries from readme_dir/README.md for files not in valid_fnames."""
+    readme_path = readme_dir / "README.md"
+    if not readme_path.is_file():
+        return
+    try:
+        # Read, filter and write under one hold of the lock, so an update the
+        # README writer makes meanwhile is neither lost nor overwritten
+        with _get_readme_lock(readme_path):
+            current_content = readme_path.read_text(encoding="utf-8")
+            fnames_to_remove = [
+                fn
+                for fn in _get_summarized_fnames_from_readme(current_content)
+                if fn not in valid_fnames
+            ]
+            if not fnames_to_remove:
+                return
+            log_message(
+                f"Pre-cleanup for {readme_path}: Removing summaries for {fnames_to_remove}"
+            )
+            modified_content = _remove_summaries_from_readme(
+                current_content, fnames_to_remove
+            )
+            if modified_content != current_content:
+                _write_readme_atomically(
+                    readme_path, modified_content, encoding="utf-8"
+                )
     except Exception as e:
-        print(f"ERROR_INJECT: Failed to write to {readme}: {e}", file=sys.stderr)
+        log_message(f"Error during pre-summarization cleanup of {readme_path}: {e}")
+
+
+def cleanup_stale_summaries(files: Iterable[Path]) -> None:
+    """Remove README summaries for files that are no longer among `files`.
+
+    Only READMEs in the directories of `files` are checked. The scans are
+    I/O-bound, so they overlap on threads; each task owns one README.
+    """
+    # Group valid file names by directory in one pass
+    valid_fnames_by_dir: dict[Path, set[str]] = {}
+    for f in files:
+        valid_fnames_by_dir.setdefault(f.parent, set()).add(f.name)
+    log_message(
+        f"Starting pre-summarization cleanup for READMEs in {len(valid_fnames_by_dir)} directories."
+    )
+    if not valid_fnames_by_dir:
+        return
+    with ThreadPoolExecutor(
+        max_workers=min(READ_MAX_WORKERS, len(valid_fnames_by_dir))
+    ) as cleanup_executor:
+        list(
+            cleanup_executor.map(
+                _remove_stale_summaries,
+                valid_fnames_by_dir.keys(),
+                valid_fnames_by_dir.values(),
+            )
+        )
 
 
 def process_paths(
     paths: Iterable[Path], root: Path, non_interactive: bool, llm_mode: str | None
 ) -> None:
     # Determine unique directories that might contain READMEs needing cleanup/updates.
-    global _TOKEN_ENCODING
-    global _TOTAL_TOKEN_COUNT
-    global _TOKEN_COUNT_LOCK
+    token_encoding = get_token_encoding()
 
-    if _TOKEN_ENCODING is None:
-        try:
-            _TOKEN_ENCODING = tiktoken.get_encoding("cl100k_base")
-        except Exception as e:
-            log_message(
-                f"Warning: Could not initialize tiktoken encoding. Token counting will be skipped. Error: {e}"
-            )
-            _TOKEN_ENCODING = None
-
-    readme_dirs_to_check: set[Path] = set()
     valid_paths_for_summarization: list[Path] = []
 
-    # First, filter paths, count tokens for eligible files, and identify directories for cleanup/summarization
+    # First, filter paths down to the files eligible for summarization
     log_message(f"Scanning {len(list(paths))} initial paths provided.")
     for p in paths:  # This paths argument is the initial list of files/dirs from CLI
         if p.is_file() and p.suffix[1:] in INCLUDE_EXTS:
@@ -878,49 +1215,14 @@ def process_paths(
                 # log_message(f"DEBUG: Skipping excluded path (in process_paths initial loop): {p}")
                 continue
 
-            # If not excluded, count tokens
-            if _TOKEN_ENCODING:
-                try:
-                    content = p.read_text(encoding="utf-8", errors="ignore")
-                    token_count = len(
-                        _TOKEN_ENCODING.encode(content, disallowed_special=())
-                    )
-                    with _TOKEN_COUNT_LOCK:
-                        _TOTAL_TOKEN_COUNT += token_count
-                    log_message(f"Tokens for {p}: {token_count}")
-                except Exception as e:
-                    log_message(f"Warning: Could not count tokens for {p}. Error: {e}")
-
             valid_paths_for_summarization.append(p)
-            if p.parent.is_dir():
-                readme_dirs_to_check.add(p.parent)
         elif (
             p.is_dir()
         ):  # If a directory is given, recursively find eligible files within it
             log_message(f"Scanning directory: {p}")
-            for sub_p in p.rglob("*"):
-                if sub_p.is_file() and sub_p.suffix[1:] in INCLUDE_EXTS:
-                    if is_path_excluded(sub_p, EXCLUDE_DIR_ITEMS, EXCLUDE_FILE_ITEMS):
-                        # log_message(f"DEBUG: Skipping excluded path (in process_paths rglob): {sub_p}")
-                        continue
-
-                    if _TOKEN_ENCODING:
-                        try:
-                            content = sub_p.read_text(encoding="utf-8", errors="ignore")
-                            token_count = len(
-                                _TOKEN_ENCODING.encode(content, disallowed_special=())
-                            )
-                            with _TOKEN_COUNT_LOCK:
-                                _TOTAL_TOKEN_COUNT += token_count
-                            log_message(f"Tokens for {sub_p}: {token_count}")
-                        except Exception as e:
-                            log_message(
-                                f"Warning: Could not count tokens for {sub_p}. Error: {e}"
-                            )
-
+            for sub_p in _iter_unexcluded_files(p):
+                if sub_p.suffix[1:] in INCLUDE_EXTS:
                     valid_paths_for_summarization.append(sub_p)
-                    if sub_p.parent.is_dir():
-                        readme_dirs_to_check.add(sub_p.parent)
 
     # Deduplicate valid_paths_for_summarization, as rglob might find files multiple times if symlinks or overlapping paths are given
     valid_paths_for_summarization = sorted(list(set(valid_paths_for_summarization)))
@@ -928,65 +1230,29 @@ def process_paths(
         f"Found {len(valid_paths_for_summarization)} unique, non-excluded files for potential processing."
     )
 
-    # --- Sequential Cleanup Phase for READMEs that might have stale entries ---
-    # This cleanup should happen based on directories that *could* have READMEs
-    # It's done before summarization to ensure we don't try to update a README that has stale entries from deleted files.
-    log_message(
-        f"Starting pre-summarization cleanup for READMEs in {len(readme_dirs_to_check)} directories."
-    )
-    for readme_dir in readme_dirs_to_check:
-        readme_path = readme_dir / "README.md"
-        if readme_path.exists() and readme_path.is_file():
-            try:
-                current_content = readme_path.read_text(encoding="utf-8")
-                original_content = current_content  # Keep a copy for comparison
-
-                summarized_fnames_in_readme = _get_summarized_fnames_from_readme(
-                    current_content
-                )
-
-                # Files that actually exist in this directory and are eligible
-                actual_fnames_in_dir_and_valid = {
-                    f.name
-                    for f in valid_paths_for_summarization
-                    if f.parent == readme_dir
-                }
-
-                fnames_to_remove_summary_for = [
-                    fn
-                    for fn in summarized_fnames_in_readme
-                    if fn not in actual_fnames_in_dir_and_valid
-                ]
+    # Count tokens once per unique file, encoding whole batches at a time
+    # Counting runs on this thread only, so a plain local total needs no lock
+    total_tokens = 0
+    if token_encoding:
+        for batch_counts in _count_tokens_in_batches(
+            token_encoding, valid_paths_for_summarization
+        ):
+            for p, token_count in batch_counts:
+                total_tokens += token_count
+                log_message(f"Tokens for {p}: {token_count}")
 
-                if fnames_to_remove_summary_for:
-                    log_message(
-                        f"Pre-cleanup for {readme_path}: Removing summaries for {fnames_to_remove_summary_for}"
-                    )
-                    modified_readme_content = current_content
-                    for fname_to_remove in fnames_to_remove_summary_for:
-                        modified_readme_content = _remove_summary_from_readme(
-                            modified_readme_content, fname_to_remove
-                        )
-
-                    if modified_readme_content != original_content:
-                        readme_lock = _get_readme_lock(readme_path)
-                        with readme_lock:
-                            readme_path.write_text(
-                                modified_readme_content, encoding="utf-8"
-                            )
-            except Exception as e:
-                log_message(
-                    f"Error during pre-summarization cleanup of {readme_path}: {e}"
-                )
+    # --- Cleanup Phase for READMEs that might have stale entries ---
+    # Done before summarization so no README keeps entries for deleted files
+    cleanup_stale_summaries(valid_paths_for_summarization)
 
     # --- Parallel Summarization and Injection Phase ---
     if not valid_paths_for_summarization:
         log_message("No valid files found for summarization.")
         if (
-            _TOKEN_ENCODING
+            token_encoding
         ):  # Still print token count if any were counted and we are exiting early
             log_message(
-                f"\nEstimated total tokens for all scanned files: {_TOTAL_TOKEN_COUNT}"
+                f"\nEstimated total tokens for all scanned files: {total_tokens}"
             )
         return
 
@@ -996,9 +1262,9 @@ def process_paths(
         log_message(f"  [{i+1}/{len(valid_paths_for_summarization)}] {f_path}")
 
     # Then, print cumulative total token count
-    if _TOKEN_ENCODING:
+    if token_encoding:
         log_message(
-            f"\nTotal estimated tokens for these {len(valid_paths_for_summarization)} files: {_TOTAL_TOKEN_COUNT}"
+            f"\nTotal estimated tokens for these {len(valid_paths_for_summarization)} files: {total_tokens}"
         )
 
     # Finally, ask for Y/N Confirmation Prompt
@@ -1049,9 +1315,8 @@ def process_paths(
                 "Please set TOGETHER_API_KEY or choose local mode (if interactive) or ensure key is in environment (if non-interactive)."
             )
             return  # Abort if API key is missing for remote mode
-        DEFAULT_MAX_WORKERS_ACTUAL = (
-            6  # Increased from 4 to 6 for better performance with remote LLM
-        )
+        # Network-bound; remote_llm caps in-flight requests itself
+        DEFAULT_MAX_WORKERS_ACTUAL = 32
         MAX_WORKERS = int(
             os.getenv("REMOTE_MAX_WORKERS", str(DEFAULT_MAX_WORKERS_ACTUAL))
         )
@@ -1067,12 +1332,16 @@ def process_paths(
         f"Starting summarization for {len(valid_paths_for_summarization)} files using up to {MAX_WORKERS} workers (mode: {llm_mode_choice})..."
     )
 
-    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+    # Summaries are written to their READMEs by a single background writer;
+    # leaving this block waits for every queued update to reach disk
+    with readme_writer() as readme_updates, ThreadPoolExecutor(
+        max_workers=max(MAX_WORKERS, 1)  # <= 0 runs sequentially below
+    ) as executor:
         if llm_mode_choice == "1" and MAX_WORKERS > 0:
             log_message("Attempting to preload local model...")
-            preload_future = executor.submit(local_llm.preload_model)
+            preload_future = local_llm.start_preload()
             try:
-                if preload_future.result(
+                if preload_future is None or preload_future.result(
                     timeout=local_llm.LLM_FIRST_ATTEMPT_TIMEOUT + 10
                 ):
                     log_message(
@@ -1101,11 +1370,12 @@ def process_paths(
                     md_summary = summarise_file(path_to_process, llm_mode_choice)
                     if md_summary and not md_summary.startswith("Error:"):
                         readme_file_path = path_to_process.parent / "README.md"
-                        readme_lock = _get_readme_lock(readme_file_path)
-                        with readme_lock:
-                            _inject(readme_file_path, path_to_process.name, md_summary)
+                        # Written by the writer thread while the next file is summarized
+                        readme_updates.put(
+                            (readme_file_path, path_to_process.name, md_summary)
+                        )
                         log_message(
-                            f"Updated (sequentially): {readme_file_path} for {path_to_process.name}"
+                            f"Queued update (sequentially): {readme_file_path} for {path_to_process.name}"
                         )
                         log_message(
                             f"************************* Completed processing: {path_to_process} *************************"
@@ -1131,12 +1401,12 @@ def process_paths(
                     log_message(
                         f"************************* Failed processing: {path_to_process} *************************"
                     )
-            if _TOKEN_ENCODING:
+            if token_encoding:
                 log_message(
-                    f"\nEstimated total tokens for all scanned files: {_TOTAL_TOKEN_COUNT}"
+                    f"\nEstimated total tokens for all scanned files: {total_tokens}"
                 )
                 log_message(
-                    f"Estimated total tokens for all scanned files (completed run): {_TOTAL_TOKEN_COUNT}"
+                    f"Estimated total tokens for all scanned files (completed run): {total_tokens}"
                 )
             return
 
@@ -1150,57 +1420,59 @@ def process_paths(
         }
 
         processed_count = 0
-        for future in as_completed(future_to_path):
-            path_processed = future_to_path[future]
-            try:
-                md_summary = future.result()
-                if md_summary and not md_summary.startswith("Error:"):
-                    readme_file_path = path_processed.parent / "README.md"
-                    readme_lock = _get_readme_lock(readme_file_path)
-                    with readme_lock:
-                        _inject(readme_file_path, path_processed.name, md_summary)
-                    log_message(
-                        f"Successfully updated {readme_file_path} for {path_processed.name}"
-                    )
-                    log_message(
-                        f"************************* Completed processing: {path_processed} *************************"
-                    )
-                elif md_summary:  # Error occurred during summarization
-                    log_message(
-                        f"Skipping injection for {path_processed.name} due to summarization error: {md_summary[:100]}..."
-                    )
-                    log_message(
-                        f"************************* Failed processing: {path_processed} *************************"
-                    )
-                else:  # No summary generated
-                    log_message(
-                        f"Warning: No summary generated (empty) for {path_processed.name}"
-                    )
+        pending = set(future_to_path)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path_processed = future_to_path[future]
+                try:
+                    md_summary = future.result()
+                    if md_summary and not md_summary.startswith("Error:"):
+                        readme_file_path = path_processed.parent / "README.md"
+                        # The writer thread coalesces updates per README
+                        readme_updates.put(
+                            (readme_file_path, path_processed.name, md_summary)
+                        )
+                        log_message(
+                            f"Queued update of {readme_file_path} for {path_processed.name}"
+                        )
+                    elif md_summary:  # Error occurred during summarization
+                        log_message(
+                            f"Skipping injection for {path_processed.name} due to summarization error: {md_summary[:100]}..."
+                        )
+                        log_message(
+                            f"************************* Failed processing: {path_processed} *************************"
+                        )
+                    else:  # No summary generated
+                        log_message(
+                            f"Warning: No summary generated (empty) for {path_processed.name}"
+                        )
+                        log_message(
+                            f"************************* Failed processing: {path_processed} *************************"
+                        )
+                except Exception as exc:
                     log_message(
-                        f"************************* Failed processing: {path_processed} *************************"
+                        f"File {path_processed.name} generated an exception during its task processing: {exc}"
                     )
-            except Exception as exc:
+
+            for future in done:
+                path_processed = future_to_path[future]
+                processed_count += 1
                 log_message(
-                    f"File {path_processed.name} generated an exception during its task processing: {exc}"
+                    f"Completed processing ({processed_count}/{len(valid_paths_for_summarization)}): {path_processed.name}"
+                )
+                # Add separator line after each file is processed
+                log_message(
+                    f"************************* Completed processing: {path_processed} *************************"
                 )
-            processed_count += 1
-            log_message(
-                f"Completed processing ({processed_count}/{len(valid_paths_for_summarization)}): {path_processed.name}"
-            )
-            # Add separator line after each file is processed
-            log_message(
-                f"************************* Completed processing: {path_processed} *************************"
-            )
 
     log_message(f"Finished processing all {len(valid_paths_for_summarization)} files.")
 
     # After all files are processed (summarized and injected), print the total token count
-    if _TOKEN_ENCODING:
-        log_message(
-            f"\nEstimated total tokens for all scanned files: {_TOTAL_TOKEN_COUNT}"
-        )
+    if token_encoding:
+        log_message(f"\nEstimated total tokens for all scanned files: {total_tokens}")
         log_message(
-            f"Estimated total tokens for all scanned files (completed run): {_TOTAL_TOKEN_COUNT}"
+            f"Estimated total tokens for all scanned files (completed run): {total_tokens}"
         )
 
     # Note: The extensive cleanup logic that was previously at the very end seems to be covered
@@ -1369,20 +1641,14 @@ def main(argv=None):
                     )
                     continue
 
-                for sub_p in p.rglob("*"):
-                    if sub_p.is_file():
-                        file_ext = sub_p.suffix.lstrip(".")
-                        if file_ext in INCLUDE_EXTS:
-                            if is_path_excluded(
-                                sub_p, EXCLUDE_DIR_ITEMS, EXCLUDE_FILE_ITEMS
-                            ):
-                                # log_message(f"DEBUG: Skipping excluded path in specified directory scan: {sub_p}")
-                                continue
-                            files_to_process.append(sub_p)
-                        else:
-                            log_message(
-                                f"DEBUG: Skipping (from dir scan, extension not in INCLUDE_EXTS): {sub_p}"
-                            )
+                for sub_p in _iter_unexcluded_files(p):
+                    file_ext = sub_p.suffix.lstrip(".")
+                    if file_ext in INCLUDE_EXTS:
+                        files_to_process.append(sub_p)
+                    else:
+                        log_message(
+                            f"DEBUG: Skipping (from dir scan, extension not in INCLUDE_EXTS): {sub_p}"
+                        )
             else:
                 log_message(
                     f"Warning: Specified path {p_str} is not a valid file or directory. Skipping."
@@ -1392,16 +1658,12 @@ def main(argv=None):
     else:  # No specific paths, scan the root directory
         log_message(f"Scanning root directory for files: {root_path}")
         temp_files = []
-        for p in root_path.rglob("*"):
-            if p.is_file():
-                file_ext = p.suffix.lstrip(".")
-                if file_ext in INCLUDE_EXTS:
-                    if is_path_excluded(p, EXCLUDE_DIR_ITEMS, EXCLUDE_FILE_ITEMS):
-                        # log_message(f"DEBUG: Skipping excluded path in root scan: {p}")
-                        continue
-                    temp_files.append(p)
-                else:
-                    log_message(f"DEBUG: Skipping (extension not in INCLUDE_EXTS): {p}")
+        for p in _iter_unexcluded_files(root_path):
+            file_ext = p.suffix.lstrip(".")
+            if file_ext in INCLUDE_EXTS:
+                temp_files.append(p)
+            else:
+                log_message(f"DEBUG: Skipping (extension not in INCLUDE_EXTS): {p}")
         files_to_process = sorted(temp_files)
 
     if not files_to_process:
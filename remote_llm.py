@@ -4,8 +4,11 @@ import os
 import sys
 import time
 import threading
+import json
+import httpx
 import openai
 import datetime
+from contextlib import contextmanager
 
 # ------------------ config ------------------
 TOGETHER_API_KEY = os.getenv("TOGETHER_API_KEY")
@@ -17,13 +20,104 @@ DEFAULT_REMOTE_MODEL = os.getenv(
 REMOTE_LLM_MAX_RETRIES = int(os.getenv("REMOTE_LLM_MAX_RETRIES", "3"))
 REMOTE_LLM_RETRY_DELAY = int(os.getenv("REMOTE_LLM_RETRY_DELAY", "5"))  # seconds
 REMOTE_LLM_TIMEOUT = float(os.getenv("REMOTE_LLM_TIMEOUT", "120.0"))  # seconds
+# In-flight requests across all threads start at the initial limit and adapt
+# (up on sustained success, halved on rate limiting) up to the max
+REMOTE_LLM_INITIAL_CONCURRENCY = int(os.getenv("REMOTE_LLM_INITIAL_CONCURRENCY", "8"))
+REMOTE_LLM_MAX_CONCURRENCY = int(os.getenv("REMOTE_LLM_MAX_CONCURRENCY", "32"))
+# Max independent prompts answered by one chat completion in llm_call_remote_batch
+REMOTE_LLM_BATCH_SIZE = int(os.getenv("REMOTE_LLM_BATCH_SIZE", "8"))
+# Batching stops for the rest of the process after this many replies in a row
+# could not be split into answers, since each one also costs a call per prompt
+REMOTE_LLM_BATCH_MAX_PARSE_FAILURES = int(
+    os.getenv("REMOTE_LLM_BATCH_MAX_PARSE_FAILURES", "3")
+)
+
+README_SYSTEM_PROMPT = """You are a specialized AI assistant. Your sole purpose is to generate content for a project's README.md file. This content is critical for improving IDE-based RAG (Retrieval Augmented Generation) systems, enabling better semantic search for both technical and non-technical users, particularly those unfamiliar with engineering lexicon.
+
+Follow these instructions STRICTLY:
+1.  Output MUST be in valid Markdown format.
+2.  Focus EXCLUSIVELY on describing the provided code or content. Do NOT add any introductory, concluding, or conversational remarks.
+3.  Generate clear, concise, accurate, and factual descriptions.
+4.  The output should be directly usable as a section within a README.md file."""
+
+# Same rules for each answer, but the reply itself is the JSON array that
+# llm_call_remote_batch splits, so Markdown applies inside its strings only
+BATCH_SYSTEM_PROMPT = """You are a specialized AI assistant that writes content for a project's README.md file. You will be given several independent tasks and must answer all of them in one reply.
+
+Follow these instructions STRICTLY:
+1.  Your entire reply MUST be a single JSON array of strings, with exactly one string per task, in task order. Do NOT wrap it in a code fence or add any text before or after it.
+2.  Each string is the complete answer to its task, written in valid Markdown and escaped as a JSON string.
+3.  Each answer must focus EXCLUSIVELY on describing the provided code or content, with no introductory, concluding, or conversational remarks.
+4.  Answers must be clear, concise, accurate, factual, and directly usable as a section within a README.md file."""
 
 _REMOTE_CACHE: dict[str, str] = {}
 _REMOTE_CACHE_LOCK = threading.Lock()
+_OPENAI_CLIENT: openai.OpenAI | None = None  # Created on first use
+_OPENAI_CLIENT_LOCK = threading.Lock()
+_BATCH_PARSE_FAILURES = 0  # Consecutive unsplittable batched replies
+_BATCH_PARSE_FAILURES_LOCK = threading.Lock()
 
 # ------------------ helpers ------------------
 
 
+class _AdaptiveConcurrencyLimit:
+    """Cap on concurrent requests, tuned additive-increase/multiplicative-decrease.
+
+    The limit grows by one after a limit's worth of consecutive successes and
+    halves when the provider rate-limits us. Each slot carries the epoch of
+    the limit it was granted under, and only a 429 from the current epoch
+    lowers the limit, so a burst of 429s from requests issued together halves
+    it once rather than once per request.
+    """
+
+    def __init__(self, initial: int, maximum: int):
+        self.maximum = max(1, maximum)
+        self.limit = max(1, min(initial, self.maximum))
+        self._in_flight = 0
+        self._successes = 0
+        self._epoch = 0
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def slot(self):
+        with self._cond:
+            self._cond.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+            epoch = self._epoch
+        try:
+            yield epoch
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+                self._cond.notify()
+
+    def record_success(self) -> None:
+        with self._cond:
+            self._successes += 1
+            if self._successes < self.limit or self.limit >= self.maximum:
+                return
+            self._successes = 0
+            self.limit += 1
+            self._cond.notify()
+        log_message(f"DEBUG_REMOTE_LLM: Concurrency limit raised to {self.limit}")
+
+    def record_rate_limited(self, epoch: int) -> None:
+        with self._cond:
+            self._successes = 0
+            if epoch != self._epoch or self.limit == 1:
+                return
+            self._epoch += 1
+            self.limit = max(1, self.limit // 2)
+        log_message(
+            f"DEBUG_REMOTE_LLM: Rate limited; concurrency limit lowered to {self.limit}"
+        )
+
+
+_REMOTE_CONCURRENCY = _AdaptiveConcurrencyLimit(
+    REMOTE_LLM_INITIAL_CONCURRENCY, REMOTE_LLM_MAX_CONCURRENCY
+)
+
+
 def get_timestamp():
     """Returns a human-readable timestamp in format: YYYY-MM-DD HH:MM:SS"""
     return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -35,21 +129,44 @@ def log_message(message, file=sys.stderr):
 
 
 def get_openai_client():
+    """Process-wide client, so every call reuses its keep-alive connection pool."""
+    global _OPENAI_CLIENT
     if not TOGETHER_API_KEY:
         raise ValueError("TOGETHER_API_KEY environment variable is not set.")
-    return openai.OpenAI(
-        api_key=TOGETHER_API_KEY,
-        base_url=TOGETHER_BASE_URL,
-        timeout=REMOTE_LLM_TIMEOUT,
-    )
+    if _OPENAI_CLIENT is None:
+        with _OPENAI_CLIENT_LOCK:
+            if _OPENAI_CLIENT is None:
+                # Enough pooled connections for the highest allowed concurrency
+                pool_size = max(REMOTE_LLM_MAX_CONCURRENCY, 1)
+                _OPENAI_CLIENT = openai.OpenAI(
+                    api_key=TOGETHER_API_KEY,
+                    base_url=TOGETHER_BASE_URL,
+                    timeout=REMOTE_LLM_TIMEOUT,
+                    # A plain httpx client: openai.DefaultHttpxClient is missing
+                    # from the early 1.x releases the requirements still allow
+                    http_client=httpx.Client(
+                        limits=httpx.Limits(
+                            max_connections=pool_size,
+                            max_keepalive_connections=pool_size,
+                        ),
+                        timeout=REMOTE_LLM_TIMEOUT,
+                        follow_redirects=True,
+                    ),
+                )
+    return _OPENAI_CLIENT
 
 
 def llm_call_remote(
-    prompt: str, model_name: str | None = None, file_path: str | None = None
+    prompt: str,
+    model_name: str | None = None,
+    file_path: str | None = None,
+    system_prompt: str = README_SYSTEM_PROMPT,
 ) -> str:
     """Blocking call to Together AI API, with thread-safe caching and retries."""
     model_to_use = model_name if model_name else DEFAULT_REMOTE_MODEL
     cache_key = f"{model_to_use}:{prompt}"
+    if system_prompt != README_SYSTEM_PROMPT:
+        cache_key = f"{model_to_use}:{system_prompt}:{prompt}"
 
     with _REMOTE_CACHE_LOCK:
         if cache_key in _REMOTE_CACHE:
@@ -68,24 +185,17 @@ def llm_call_remote(
                     f"[Thread-{thread_id}] DEBUG_REMOTE_LLM: Attempt {attempt + 1}/{REMOTE_LLM_MAX_RETRIES}{file_info} for model '{model_to_use}' prompt starting with '{prompt_snippet}...'"
                 )
 
-                completion = client.chat.completions.create(
-                    model=model_to_use,
-                    messages=[
-                        # Using a simple system prompt, can be customized if needed
-                        {
-                            "role": "system",
-                            "content": """You are a specialized AI assistant. Your sole purpose is to generate content for a project's README.md file. This content is critical for improving IDE-based RAG (Retrieval Augmented Generation) systems, enabling better semantic search for both technical and non-technical users, particularly those unfamiliar with engineering lexicon.
-
-Follow these instructions STRICTLY:
-1.  Output MUST be in valid Markdown format.
-2.  Focus EXCLUSIVELY on describing the provided code or content. Do NOT add any introductory, concluding, or conversational remarks.
-3.  Generate clear, concise, accurate, and factual descriptions.
-4.  The output should be directly usable as a section within a README.md file.""",
-                        },
-                        {"role": "user", "content": prompt},
-                    ],
-                    # stream=False # Default is False
-                )
+                # Held only for the request itself, not for retry back-off
+                with _REMOTE_CONCURRENCY.slot() as limit_epoch:
+                    completion = client.chat.completions.create(
+                        model=model_to_use,
+                        messages=[
+                            {"role": "system", "content": system_prompt},
+                            {"role": "user", "content": prompt},
+                        ],
+                        # stream=False # Default is False
+                    )
+                _REMOTE_CONCURRENCY.record_success()
                 response_text = completion.choices[0].message.content.strip()
                 if not response_text:
                     response_text = "Error: Remote LLM returned empty response."
@@ -99,6 +209,7 @@ Follow these instructions STRICTLY:
                     f"Warning: Remote LLM API connection error{file_info} (attempt {attempt + 1}/{REMOTE_LLM_MAX_RETRIES}): {e}"
                 )
             except openai.RateLimitError as e:
+                _REMOTE_CONCURRENCY.record_rate_limited(limit_epoch)
                 response_text = f"Error: Remote LLM API rate limit exceeded - {e}"
                 log_message(
                     f"Warning: Remote LLM API rate limit exceeded{file_info} (attempt {attempt + 1}/{REMOTE_LLM_MAX_RETRIES}): {e}"
@@ -160,7 +271,82 @@ Follow these instructions STRICTLY:
 
         return response_text
     finally:
-        pass  # Ensure semaphore is always released (removed as semaphore is removed)
+        pass  # The _REMOTE_CONCURRENCY slot is released by its with block above
+
+
+def _split_batch_response(response_text: str, expected: int) -> list[str] | None:
+    """Parse a batched reply (a JSON array of strings) into its answers."""
+    text = response_text.strip()
+    # Models often wrap JSON in a Markdown code fence despite instructions
+    start, end = text.find("["), text.rfind("]")
+    if start == -1 or end < start:
+        return None
+    try:
+        answers = json.loads(text[start : end + 1])
+    except ValueError:
+        return None
+    if (
+        not isinstance(answers, list)
+        or len(answers) != expected
+        or not all(isinstance(a, str) and a.strip() for a in answers)
+    ):
+        return None
+    return [a.strip() for a in answers]
+
+
+def llm_call_remote_batch(
+    prompts: list[str], model_name: str | None = None, file_path: str | None = None
+) -> list[str]:
+    """Answer several independent prompts with a single chat completion.
+
+    Returns one response per prompt, in order. If the reply cannot be split
+    back into exactly one answer per prompt, each prompt is sent on its own;
+    after REMOTE_LLM_BATCH_MAX_PARSE_FAILURES such replies in a row, prompts
+    are always sent on their own.
+    """
+    global _BATCH_PARSE_FAILURES
+    if (
+        len(prompts) == 1
+        or _BATCH_PARSE_FAILURES >= REMOTE_LLM_BATCH_MAX_PARSE_FAILURES
+    ):
+        return [llm_call_remote(prompt, model_name, file_path) for prompt in prompts]
+
+    tasks = "\n\n".join(
+        f"<<TASK {i}>>\n{prompt}\n<<END TASK {i}>>"
+        for i, prompt in enumerate(prompts, 1)
+    )
+    batch_prompt = (
+        f"Below are {len(prompts)} independent tasks. Complete each one exactly as "
+        "if it had been given to you on its own.\n"
+        f"Respond with ONLY a JSON array of {len(prompts)} strings, where string N "
+        "is your complete Markdown answer to TASK N. Do not add any other text.\n\n"
+        f"{tasks}"
+    )
+    response_text = llm_call_remote(
+        batch_prompt, model_name, file_path, system_prompt=BATCH_SYSTEM_PROMPT
+    )
+    if response_text.startswith("Error:"):
+        # The batch already used up its retries; don't repeat them per prompt
+        return [response_text] * len(prompts)
+
+    answers = _split_batch_response(response_text, len(prompts))
+    with _BATCH_PARSE_FAILURES_LOCK:
+        if answers is not None:
+            _BATCH_PARSE_FAILURES = 0
+        else:
+            _BATCH_PARSE_FAILURES += 1
+            failures = _BATCH_PARSE_FAILURES
+    if answers is None:
+        file_info = f" for file '{file_path}'" if file_path else ""
+        log_message(
+            f"Warning: Could not split batched Remote LLM response{file_info} into {len(prompts)} answers. Falling back to one call per prompt."
+        )
+        if failures == REMOTE_LLM_BATCH_MAX_PARSE_FAILURES:
+            log_message(
+                f"Warning: {failures} batched Remote LLM responses in a row could not be split. Sending prompts individually from now on."
+            )
+        return [llm_call_remote(prompt, model_name, file_path) for prompt in prompts]
+    return answers
 
 
 # Example usage (optional, for testing this module directly)
@@ -15,11 +15,8 @@ function displayLogs(logsArray, targetElement) {
       'border: 1px solid #ccc; text-align: left; white-space: pre-wrap; font-size: 12px;">' + 
       logsHtml + '</pre>';
     
-    if (targetElement.innerHTML.includes('successfully')) {
-      targetElement.innerHTML += logSection;
-    } else {
-      targetElement.innerHTML = targetElement.innerHTML + logSection;
-    }
+    // insertAdjacentHTML parses only the new markup instead of re-serializing the element
+    targetElement.insertAdjacentHTML('beforeend', logSection);
     
     console.log("Displayed logs:", logsArray.length, "lines");
     return true;
@@ -38,6 +35,64 @@ function attachLlmMode(event) {
   });
 }
 
+// Reads the /process-project NDJSON stream, showing progress as files finish.
+// Returns the final line, which carries the same fields as a JSON response,
+// or an error if the stream ended before that line arrived.
+async function readProjectStream(response, statusDiv) {
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let pending = '';
+  let failed = 0;
+  let result = null;
+
+  const handleLine = line => {
+    if (!line.trim()) return;
+    const record = JSON.parse(line);
+    if ('path' in record) {
+      if (!record.ok) failed++;
+      statusDiv.innerHTML = `Processing project... ${record.done}/${record.total} files done` +
+        (failed ? `, ${failed} failed` : '') + ` (last: ${escapeHtml(record.path)})`;
+    } else {
+      result = record;
+    }
+  };
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    pending += decoder.decode(value, { stream: true });
+    const lines = pending.split('\n');
+    pending = lines.pop();
+    lines.forEach(handleLine);
+  }
+  handleLine(pending + decoder.decode());
+  return result || {
+    error: 'Connection closed before the project run reported its result',
+    logs: []
+  };
+}
+
+function createLogLine(text, isError) {
+  const line = document.createElement('div');
+  line.className = isError ? 'log-line error' : 'log-line';
+  line.textContent = text;
+  return line;
+}
+
+// Keep the live log as bounded as the server's ring buffer (LOG_BUFFER_MAXLEN)
+const maxLogLines = 500;
+
+// Appends one or more log lines with a single DOM insertion and scroll
+function appendLogLines(logContainer, lines, isError) {
+  const fragment = document.createDocumentFragment();
+  lines.forEach(text => fragment.appendChild(createLogLine(text, isError)));
+  logContainer.appendChild(fragment);
+  while (logContainer.childElementCount > maxLogLines) {
+    logContainer.removeChild(logContainer.firstElementChild);
+  }
+  logContainer.scrollTop = logContainer.scrollHeight;
+}
+
 let eventSource;
 let reconnectAttempts = 0;
 const maxReconnectAttempts = 5;
@@ -55,8 +110,7 @@ function setupLogStream() {
   eventSource.onopen = function() {
     console.log('Log stream connected');
     reconnectAttempts = 0;
-    logContainer.innerHTML += '<div class="log-line">[System] Connected to log stream</div>';
-    logContainer.scrollTop = logContainer.scrollHeight;
+    appendLogLines(logContainer, ['[System] Connected to log stream']);
   };
   
   eventSource.onmessage = function(event) {
@@ -64,10 +118,7 @@ function setupLogStream() {
       const data = JSON.parse(event.data);
       
       if (data.logs && Array.isArray(data.logs)) {
-        data.logs.forEach(logLine => {
-          logContainer.innerHTML += `<div class="log-line">${escapeHtml(logLine)}</div>`;
-        });
-        logContainer.scrollTop = logContainer.scrollHeight;
+        appendLogLines(logContainer, data.logs);
       }
       
       if (data.status) {
@@ -80,23 +131,23 @@ function setupLogStream() {
       
     } catch (e) {
       console.error('Error parsing log stream data:', e);
-      logContainer.innerHTML += `<div class="log-line error">[System] Error processing log: ${e.message}</div>`;
+      appendLogLines(logContainer, [`[System] Error processing log: ${e.message}`], true);
     }
   };
   
   eventSource.onerror = function(error) {
     console.error('Log stream error:', error);
     statusIndicator.className = "status-indicator status-inactive";
-    logContainer.innerHTML += '<div class="log-line error">[System] Connection error. Attempting to reconnect...</div>';
+    appendLogLines(logContainer, ['[System] Connection error. Attempting to reconnect...'], true);
     
     eventSource.close();
     
     if (reconnectAttempts < maxReconnectAttempts) {
       reconnectAttempts++;
       setTimeout(setupLogStream, reconnectDelay * reconnectAttempts);
-      logContainer.innerHTML += `<div class="log-line">[System] Reconnect attempt ${reconnectAttempts}/${maxReconnectAttempts}...</div>`;
+      appendLogLines(logContainer, [`[System] Reconnect attempt ${reconnectAttempts}/${maxReconnectAttempts}...`]);
     } else {
-      logContainer.innerHTML += '<div class="log-line error">[System] Failed to reconnect after multiple attempts. Please reload the page.</div>';
+      appendLogLines(logContainer, ['[System] Failed to reconnect after multiple attempts. Please reload the page.'], true);
     }
   };
 }
@@ -129,21 +180,26 @@ document.addEventListener('DOMContentLoaded', function() {
               });
               
               let result = {};
-              try {
-                  result = await response.json();
-                  console.log("Received JSON response:", result);
-              } catch (parseError) {
-                  const textContent = await response.text();
-                  console.error("Failed to parse JSON response:", parseError);
-                  console.log("Raw response text:", textContent.substring(0, 500) + "...");
-                  result = { 
-                      error: "Failed to parse server response: " + parseError.message,
-                      message: "Server returned non-JSON response",
-                      logs: ["Error parsing server response. Raw content (truncated):", textContent.substring(0, 300) + "..."]
-                  };
+              if (response.ok && response.body) {
+                  // NDJSON: one line per finished file, then the run summary
+                  result = await readProjectStream(response, statusDiv);
+              } else {
+                  try {
+                      result = await response.json();
+                      console.log("Received JSON response:", result);
+                  } catch (parseError) {
+                      const textContent = await response.text();
+                      console.error("Failed to parse JSON response:", parseError);
+                      console.log("Raw response text:", textContent.substring(0, 500) + "...");
+                      result = { 
+                          error: "Failed to parse server response: " + parseError.message,
+                          message: "Server returned non-JSON response",
+                          logs: ["Error parsing server response. Raw content (truncated):", textContent.substring(0, 300) + "..."]
+                      };
+                  }
               }
               
-              if (response.ok) {
+              if (response.ok && !result.error) {
                   statusDiv.innerHTML = result.message || 'Project processing completed.';
                   statusDiv.classList.remove('info', 'error');
                   statusDiv.classList.add('success');
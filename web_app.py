@@ -2,31 +2,154 @@
 
 from __future__ import annotations
 
+import atexit
 import os
 from pathlib import Path
 import sys  # For stderr
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from collections import deque
 from contextlib import contextmanager
+from contextvars import ContextVar
+from itertools import islice
 import io
-from threading import Lock
+import logging
+import logging.handlers
+import queue
+import threading
+from threading import Event, Lock
 import time
-import json
+import traceback
 from datetime import datetime
 
-from flask import Flask, request, jsonify, render_template, Response
+from flask import Flask, request, jsonify, Response, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+import orjson
 
 # Import the whole module to access its functions and submodules/variables
 import readme_sync
-import tiktoken  # Explicitly for initializing readme_sync._TOKEN_ENCODING
 
 ROOT = Path(os.getenv("RMSYNC_ROOT", ".")).resolve()
+
+
+class OrJSONProvider(DefaultJSONProvider):
+    """Serialize jsonify() responses with orjson instead of the stdlib json module."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
 app = Flask(__name__)
+app.json = OrJSONProvider(app)
+# Compile the page template once at import instead of looking it up per request
+_INDEX_TMPL = app.jinja_env.get_template("index.html")
+# ((file list, script root), page) for the last render; the page is static
+# apart from the listing, so it is reused until the listing changes.
+# Replaced with one atomic assignment, read without a lock
+_INDEX_PAGE_CACHE: tuple[tuple[list[str], str], str] | None = None
+
+# Bounded ring of (seq, message) pairs; deque evicts the oldest entry in O(1)
+LOG_BUFFER_MAXLEN = 500
+WEB_APP_LOG_BUFFER: deque[tuple[int, str]] = deque(maxlen=LOG_BUFFER_MAXLEN)
+WEB_APP_LOG_LOCK = Lock()  # Guards WEB_APP_LOG_BUFFER and per-request log deques
+_LOG_SEQ = 0  # Monotonic sequence number of the last appended log line
+# Notified on every append so /log-stream readers sleep until there is news
+_LOG_COND = threading.Condition(WEB_APP_LOG_LOCK)
+SSE_KEEPALIVE_SECONDS = 15  # Idle interval before a keep-alive comment is sent
+SSE_COALESCE_SECONDS = 0.05  # Batching window for lines sent in one SSE frame
+# Lines logged while handling the current /generate or /process-project request;
+# returned with its JSON response so concurrent requests never mix logs
+_REQUEST_LOGS: ContextVar[deque[str] | None] = ContextVar("request_logs", default=None)
+# (active, id) pair; replaced with a single atomic assignment, read without a lock
+PROCESSING_STATUS = {"state": (False, None)}
+# Set at interpreter exit so open /log-stream generators stop waiting
+_SHUTDOWN_EVENT = Event()
+# Summarization worker counts per LLM mode; <= 0 processes files sequentially
+LOCAL_MAX_WORKERS = int(os.getenv("LOCAL_MAX_WORKERS", "2"))
+# Remote calls are network-bound; remote_llm caps in-flight requests
+# (REMOTE_LLM_MAX_CONCURRENCY), so many workers are cheap
+REMOTE_MAX_WORKERS = int(os.getenv("REMOTE_MAX_WORKERS", "32"))
+# One pool per LLM mode for the life of the process, instead of starting and
+# joining threads on every /process-project request
+_SUMMARY_EXECUTORS = {
+    mode: ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix=f"summarise-{name}"
+    )
+    for mode, name, workers in (
+        ("1", "local", LOCAL_MAX_WORKERS),
+        ("2", "remote", REMOTE_MAX_WORKERS),
+    )
+    if workers > 0
+}
+
+# Server-side log output goes through a queue to a single listener thread that
+# writes to the real stderr, so request and worker threads never block on it
+_SERVER_LOG = logging.getLogger("web_app")
+_SERVER_LOG.setLevel(logging.INFO)
+_SERVER_LOG.propagate = False
+_SERVER_LOG_QUEUE = queue.SimpleQueue()
+_SERVER_LOG.addHandler(logging.handlers.QueueHandler(_SERVER_LOG_QUEUE))
+_SERVER_LOG_LISTENER = logging.handlers.QueueListener(
+    _SERVER_LOG_QUEUE, logging.StreamHandler(sys.stderr)
+)
+_SERVER_LOG_LISTENER.start()
+atexit.register(_SERVER_LOG_LISTENER.stop)
+
+
+def _shutdown_summary_executors():
+    """Cancel queued summaries, so exiting only waits for calls already running."""
+    for executor in _SUMMARY_EXECUTORS.values():
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+@atexit.register
+def _wake_log_streams():
+    _SHUTDOWN_EVENT.set()
+    with _LOG_COND:
+        _LOG_COND.notify_all()
+
+
+def _set_processing_inactive():
+    """Mark processing as finished, keeping the id of the last run."""
+    PROCESSING_STATUS["state"] = (False, PROCESSING_STATUS["state"][1])
+
+
+def _start_request_logs():
+    """Give the current request its own log, bounded like the live buffer."""
+    _REQUEST_LOGS.set(deque(maxlen=LOG_BUFFER_MAXLEN))
+
+
+def _ndjson_line(**fields):
+    """One newline-terminated JSON object for a streamed NDJSON response."""
+    return orjson.dumps(fields).decode() + "\n"
+
+
+def _request_logs():
+    """Lines logged so far by the current request, as a JSON-ready list."""
+    request_logs = _REQUEST_LOGS.get()
+    if request_logs is None:
+        return []
+    # Worker threads may still be appending; copy under the same lock
+    with WEB_APP_LOG_LOCK:
+        return list(request_logs)
+
+
+@app.teardown_request
+def _end_request_logs(exc=None):
+    _REQUEST_LOGS.set(None)
+
 
-# Create an explicit log list for collecting messages
-WEB_APP_LOG_BUFFER = []
-WEB_APP_LOG_LOCK = Lock()  # Add Lock import back for this purpose
-PROCESSING_STATUS = {"active": False, "id": None}
-STATUS_LOCK = Lock()
+def _append_log(message, request_logs=None):
+    """Append one line to the ring buffer (and request_logs, if given)."""
+    global _LOG_SEQ
+    with WEB_APP_LOG_LOCK:
+        if request_logs is not None:
+            request_logs.append(message)
+        _LOG_SEQ += 1
+        WEB_APP_LOG_BUFFER.append((_LOG_SEQ, message))
+        _LOG_COND.notify_all()
 
 
 # Add a direct logging function
@@ -35,14 +158,11 @@ def web_log(message):
     timestamp = datetime.now().strftime("%H:%M:%S")
     formatted_message = f"[{timestamp}] {message}"
 
-    with WEB_APP_LOG_LOCK:
-        WEB_APP_LOG_BUFFER.append(formatted_message)
-        # Keep the buffer at a reasonable size
-        if len(WEB_APP_LOG_BUFFER) > 500:  # Increased buffer size
-            WEB_APP_LOG_BUFFER.pop(0)
+    _append_log(formatted_message, _REQUEST_LOGS.get())
 
-    # Also print to actual stderr for server logs
-    print(formatted_message, file=sys.stderr)
+    # Also write to actual stderr for server logs (past any capture tee, which
+    # would otherwise log the line a second time)
+    _SERVER_LOG.info(formatted_message)
 
 
 @contextmanager
@@ -53,70 +173,217 @@ def capture_stderr_globally():
 
     # Create a tee-like object that writes to both
     class TeeStderr:
+        def __init__(self):
+            # Captured lines (from any thread) also go to the capturing request
+            self._request_logs = _REQUEST_LOGS.get()
+            # Partial lines per thread, so print()'s separate writes of text
+            # and "\n" only reach the shared buffer once, as a whole line
+            self._local = threading.local()
+            # Lines go to the queued server log, unless another capture is
+            # active underneath, which then gets them too
+            self._nested = hasattr(old_stderr, "flush_partial")
+
+        def _emit(self, line):
+            if self._nested:
+                old_stderr.write(line + "\n")
+            else:
+                _SERVER_LOG.info(line)
+            # Also add non-empty, non-whitespace lines to our global buffer
+            if line.strip():
+                _append_log(line.rstrip(), self._request_logs)
+
         def write(self, message):
             string_io_buffer.write(message)
-            old_stderr.write(message)
-            # Also add non-empty, non-whitespace lines to our global buffer
-            if message.strip():
-                with WEB_APP_LOG_LOCK:
-                    WEB_APP_LOG_BUFFER.append(message.rstrip())
-                    # Keep the buffer at a reasonable size
-                    if len(WEB_APP_LOG_BUFFER) > 100:
-                        WEB_APP_LOG_BUFFER.pop(0)
+            pending = getattr(self._local, "buf", "") + message
+            *lines, self._local.buf = pending.split("\n")
+            for line in lines:
+                self._emit(line)
 
         def flush(self):
             string_io_buffer.flush()
             old_stderr.flush()
 
-    sys.stderr = TeeStderr()
+        def flush_partial(self):
+            """Publish this thread's unterminated line, if any."""
+            line = getattr(self._local, "buf", "")
+            self._local.buf = ""
+            if line:
+                self._emit(line)
+
+    tee = TeeStderr()
+    sys.stderr = tee
     try:
         yield string_io_buffer
     finally:
         sys.stderr = old_stderr
+        tee.flush_partial()
 
 
-# Helper to ensure readme_sync's tokenizer is initialized
-def ensure_readme_sync_tokenizer_initialized():
-    if readme_sync._TOKEN_ENCODING is None:
-        print(
-            "Attempting to initialize readme_sync._TOKEN_ENCODING from web_app...",
-            file=sys.stderr,
-        )
+# Load the tokenizer at startup so the first request doesn't pay for it
+readme_sync.get_token_encoding()
+
+
+# Token count per file, keyed by path and valid while (st_mtime_ns, st_size)
+# match, so repeat runs only encode files that changed. Only the files of the
+# latest count are kept, so deleted and renamed files don't pile up
+_TOKEN_COUNTS: dict[Path, tuple[int, int, int]] = {}
+
+
+def _count_project_tokens(encoding, paths):
+    """Sum token counts for paths using encoding.
+
+    Files unchanged since they were last counted are not read again; the
+    rest go through readme_sync's batched, concurrent read-and-encode.
+    """
+    total = 0
+    stale = {}
+    for p in paths:
         try:
-            readme_sync._TOKEN_ENCODING = tiktoken.get_encoding("cl100k_base")
-            print("readme_sync._TOKEN_ENCODING initialized.", file=sys.stderr)
-        except Exception as e:
+            st = p.stat()
+        except Exception as e_token:  # Catch specific token counting error
             print(
-                f"Failed to initialize readme_sync._TOKEN_ENCODING: {e}",
-                file=sys.stderr,
+                f"WEB_APP: Warning: Could not count tokens for {p}: {e_token}",
+                file=sys.stderr,  # Logged to buffer
             )
-            # readme_sync functions should handle _TOKEN_ENCODING being None if it fails
+            continue
+        cached = _TOKEN_COUNTS.get(p)
+        if cached and cached[:2] == (st.st_mtime_ns, st.st_size):
+            total += cached[2]
+        else:
+            stale[p] = (st.st_mtime_ns, st.st_size)
+
+    for batch_counts in readme_sync._count_tokens_in_batches(encoding, list(stale)):
+        for p, count in batch_counts:
+            _TOKEN_COUNTS[p] = (*stale[p], count)
+            total += count
+
+    # Iterate a snapshot: another run's count may be updating the dict too
+    current = set(paths)
+    for p in list(_TOKEN_COUNTS):
+        if p not in current:
+            _TOKEN_COUNTS.pop(p, None)
+    return total
+
+
+# (path, root-relative string) entries per root, with the mtime of every
+# directory walked to build them
+_FILES_CACHE: dict[Path, tuple[dict[str, int], list[tuple[Path, str]]]] = {}
+# Root-relative string -> path, per root, for the same entries
+_FILES_BY_RELPATH: dict[Path, dict[str, Path]] = {}
+_FILES_CACHE_LOCK = Lock()
+
+
+def _dir_mtimes_unchanged(dir_mtimes):
+    """True if no walked directory had entries added, removed or renamed since."""
+    try:
+        return all(os.stat(d).st_mtime_ns == m for d, m in dir_mtimes.items())
+    except OSError:
+        return False
 
 
 # Helper to collect files, consistent with readme_sync.py logic
 def get_project_files(root_path):
+    """Return sorted (path, path relative to root_path as str) pairs."""
+    with _FILES_CACHE_LOCK:
+        cached = _FILES_CACHE.get(root_path)
+    if cached is not None and _dir_mtimes_unchanged(cached[0]):
+        return list(cached[1])
+
+    dir_mtimes = {}
     files_to_process = []
-    # print(f"Scanning directory for project files: {root_path}", file=sys.stderr)
-    for p in root_path.rglob(
-        "*.*"
-    ):  # More specific glob to avoid walking unnecessary dirs
-        if p.is_file():
-            file_ext = p.suffix.lstrip(".")
-            if file_ext in readme_sync.INCLUDE_EXTS:
-                if readme_sync.is_path_excluded(
-                    p, readme_sync.EXCLUDE_DIR_ITEMS, readme_sync.EXCLUDE_FILE_ITEMS
+    # Like is_path_excluded, the root's own ancestors count as parents too
+    root_excluded = any(
+        readme_sync._dir_name_excluded(part)
+        for part in root_path.parts
+        if part and part != root_path.anchor
+    )
+    # Walk with os.scandir directly: each entry's type comes from the
+    # directory listing, so files need no extra stat() call
+    pending_dirs = [os.fspath(root_path)]
+    while pending_dirs:
+        dirpath = pending_dirs.pop()
+        try:
+            dir_mtimes[dirpath] = os.stat(dirpath).st_mtime_ns
+        except OSError:
+            continue  # Removed since it was listed; os.walk skipped these too
+        if root_excluded:
+            break
+        # Relative prefix for every file in this directory, computed once
+        rel_dir = os.path.relpath(dirpath, root_path)
+        rel_prefix = "" if rel_dir == "." else rel_dir + os.sep
+        try:
+            entries = os.scandir(dirpath)
+        except OSError:
+            continue  # Unreadable directory; os.walk skipped these too
+        with entries:
+            for entry in entries:
+                name = entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    # Prune excluded directories before descending; files
+                    # below a kept directory then only need the name check
+                    if not readme_sync._dir_name_excluded(name):
+                        pending_dirs.append(entry.path)
+                    continue
+                file_ext = os.path.splitext(name)[1].lstrip(".")
+                if file_ext not in readme_sync.INCLUDE_EXTS:
+                    continue
+                if readme_sync.is_file_name_excluded(
+                    name, readme_sync.EXCLUDE_FILE_ITEMS
                 ):
                     continue
-                files_to_process.append(p)
-    return sorted(list(set(files_to_process)))
+                if not entry.is_file():
+                    continue
+                files_to_process.append((Path(entry.path), rel_prefix + name))
+    # Each file is listed once, so no dedup is needed
+    files_to_process.sort()
+
+    with _FILES_CACHE_LOCK:
+        _FILES_CACHE[root_path] = (dir_mtimes, files_to_process)
+        _FILES_BY_RELPATH[root_path] = {rel: p for p, rel in files_to_process}
+    return list(files_to_process)
+
+
+def lookup_project_file(root_path, rel_path):
+    """Path of the listed project file rel_path, or None if it is not one.
+
+    Served from the last scan once the file is confirmed to still exist; a
+    miss or a vanished file rescans, to pick up new and removed files.
+    """
+    with _FILES_CACHE_LOCK:
+        by_relpath = _FILES_BY_RELPATH.get(root_path)
+    p = by_relpath.get(rel_path) if by_relpath is not None else None
+    if p is None or not p.is_file():
+        get_project_files(root_path)
+        with _FILES_CACHE_LOCK:
+            p = _FILES_BY_RELPATH[root_path].get(rel_path)
+    # The rescan may have been served from its own cache, so check once more
+    return p if p is not None and p.is_file() else None
+
+
+def _log_preload_result(preload_future):
+    try:
+        if preload_future.result():
+            print(
+                "WEB_APP: Local model preloaded successfully or was already loaded.",
+                file=sys.stderr,
+            )
+        else:
+            print(
+                "WEB_APP: Local model preloading failed or indicated model was not ready.",
+                file=sys.stderr,
+            )
+    except Exception as e_preload:
+        print(
+            f"WEB_APP: Error during local model preloading: {e_preload}",
+            file=sys.stderr,
+        )
 
 
 @app.route("/")
 def index():
+    global _INDEX_PAGE_CACHE
     print(f"DEBUG: ROOT path is: {ROOT}", file=sys.stderr)
     try:
-        ensure_readme_sync_tokenizer_initialized()
-        display_files = []
         # Using get_project_files to ensure consistency in what's listed vs processed
         print("DEBUG: Calling get_project_files...", file=sys.stderr)
         project_files = get_project_files(ROOT)
@@ -124,44 +391,45 @@ def index():
             f"DEBUG: get_project_files returned {len(project_files)} files.",
             file=sys.stderr,
         )
-        for p in project_files:
-            display_files.append(str(p.relative_to(ROOT)))
-
-        print("DEBUG: Attempting to render template...", file=sys.stderr)
-        response = render_template("index.html", files=sorted(list(set(display_files))))
-        print("DEBUG: Template rendered successfully.", file=sys.stderr)
+        # Already unique and sorted by path, so no set() or re-sort
+        display_files = [rel_path for _, rel_path in project_files]
+
+        page_key = (display_files, request.script_root)
+        cached_page = _INDEX_PAGE_CACHE
+        if cached_page is not None and cached_page[0] == page_key:
+            page = cached_page[1]
+            print("DEBUG: Reusing page rendered for this file list.", file=sys.stderr)
+        else:
+            print("DEBUG: Attempting to render template...", file=sys.stderr)
+            page = _INDEX_TMPL.render(files=display_files)
+            _INDEX_PAGE_CACHE = (page_key, page)
+            print("DEBUG: Template rendered successfully.", file=sys.stderr)
+        response = Response(page, mimetype="text/html")
         return response
     except Exception as e:
         print(f"ERROR in index route: {type(e).__name__}: {e}", file=sys.stderr)
-        import traceback
-
-        traceback.print_exc(file=sys.stderr)
+        # Format the traceback once for both the server log and the error page
+        tb_str = "".join(traceback.TracebackException.from_exception(e).format())
+        print(tb_str, end="", file=sys.stderr)
         # Return a 500 error page with the error information
         return (
-            f"Internal Server Error: {type(e).__name__}: {e}<pre>{traceback.format_exc()}</pre>",
+            f"Internal Server Error: {type(e).__name__}: {e}<pre>{tb_str}</pre>",
             500,
         )
 
 
 @app.route("/generate", methods=["POST"])
 def generate():
-    global WEB_APP_LOG_BUFFER
     global PROCESSING_STATUS
 
     # Update processing status
-    with STATUS_LOCK:
-        PROCESSING_STATUS["active"] = True
-        PROCESSING_STATUS["id"] = f"file-{int(time.time())}"
-
-    # Clear the log buffer for this request
-    with WEB_APP_LOG_LOCK:
-        WEB_APP_LOG_BUFFER = []
+    PROCESSING_STATUS["state"] = (True, f"file-{time.monotonic_ns()}")
 
-    logs_for_response = []
+    # Collect this request's log lines separately from the shared live buffer
+    _start_request_logs()
 
     try:
         web_log(f"WEB_APP: Starting generate endpoint")
-        ensure_readme_sync_tokenizer_initialized()
         rel_path = request.form.get("path")
         llm_mode_choice = request.form.get("llm_mode", "2")  # Default to remote (2)
 
@@ -170,30 +438,29 @@ def generate():
         if not rel_path:
             web_log("WEB_APP: No path provided")
             # Update processing status to inactive
-            with STATUS_LOCK:
-                PROCESSING_STATUS["active"] = False
-            return jsonify(error="No path provided", logs=WEB_APP_LOG_BUFFER[-15:]), 400
-
-        path = (ROOT / rel_path).resolve()
-        if not path.is_file() or not path.exists():
-            web_log(f"WEB_APP: File not found: {path}")
+            _set_processing_inactive()
+            return jsonify(error="No path provided", logs=_request_logs()), 400
+
+        # Only files listed on the page can be summarised; this also rejects
+        # paths that would escape ROOT
+        path = lookup_project_file(ROOT, rel_path)
+        if path is None:
+            web_log(f"WEB_APP: File not found: {rel_path}")
             # Update processing status to inactive
-            with STATUS_LOCK:
-                PROCESSING_STATUS["active"] = False
+            _set_processing_inactive()
             return (
-                jsonify(error=f"File not found: {path}", logs=WEB_APP_LOG_BUFFER[-15:]),
+                jsonify(error=f"File not found: {rel_path}", logs=_request_logs()),
                 404,
             )
 
         if llm_mode_choice == "2" and not readme_sync.remote_llm.TOGETHER_API_KEY:
             web_log("WEB_APP: Remote LLM mode selected but TOGETHER_API_KEY not set")
             # Update processing status to inactive
-            with STATUS_LOCK:
-                PROCESSING_STATUS["active"] = False
+            _set_processing_inactive()
             return (
                 jsonify(
                     error="Remote LLM mode selected, but TOGETHER_API_KEY is not set.",
-                    logs=WEB_APP_LOG_BUFFER[-15:],
+                    logs=_request_logs(),
                 ),
                 500,
             )
@@ -205,12 +472,13 @@ def generate():
                 web_log(f"WEB_APP: Calling readme_sync.summarise_file")
                 md = readme_sync.summarise_file(path, llm_mode_choice=llm_mode_choice)
 
-                if md.startswith("Error:"):
+                if not md or md.startswith("Error:"):
+                    # Never write an empty section into the README
+                    md = md or "Error: Summarization produced no content."
                     web_log(f"WEB_APP: Summarization error: {md}")
                     # Update processing status to inactive
-                    with STATUS_LOCK:
-                        PROCESSING_STATUS["active"] = False
-                    return jsonify(error=md, logs=WEB_APP_LOG_BUFFER[-15:]), 500
+                    _set_processing_inactive()
+                    return jsonify(error=md, logs=_request_logs()), 500
 
                 readme_file_path = path.parent / "README.md"
                 readme_lock = readme_sync._get_readme_lock(readme_file_path)
@@ -221,44 +489,39 @@ def generate():
                 web_log(f"WEB_APP: Successfully generated and injected for {path}")
 
                 # Update processing status to inactive
-                with STATUS_LOCK:
-                    PROCESSING_STATUS["active"] = False
+                _set_processing_inactive()
 
                 # We use our global log buffer now instead of the direct capture
                 return jsonify(
                     summary=md,
-                    path=str(path.relative_to(ROOT)),
-                    readme_path=str(readme_file_path.relative_to(ROOT)),
-                    logs=WEB_APP_LOG_BUFFER[-15:],
+                    # rel_path is the file's key in the scan, already
+                    # relative to ROOT
+                    path=rel_path,
+                    readme_path=os.path.join(os.path.dirname(rel_path), "README.md"),
+                    logs=_request_logs(),
                 )
             except Exception as inner_e:
                 web_log(f"WEB_APP: Exception during processing: {inner_e}")
-                import traceback
-
                 tb_str = traceback.format_exc()
                 web_log(f"WEB_APP: Traceback: {tb_str}")
 
                 # Update processing status to inactive
-                with STATUS_LOCK:
-                    PROCESSING_STATUS["active"] = False
+                _set_processing_inactive()
 
-                return jsonify(error=str(inner_e), logs=WEB_APP_LOG_BUFFER[-15:]), 500
+                return jsonify(error=str(inner_e), logs=_request_logs()), 500
 
     except Exception as outer_e:
         web_log(f"WEB_APP: Critical error: {outer_e}")
-        import traceback
-
         tb_str = traceback.format_exc()
         web_log(f"WEB_APP: Traceback: {tb_str}")
 
         # Update processing status to inactive
-        with STATUS_LOCK:
-            PROCESSING_STATUS["active"] = False
+        _set_processing_inactive()
 
         return (
             jsonify(
                 error=f"Critical server error: {str(outer_e)}",
-                logs=WEB_APP_LOG_BUFFER[-15:],
+                logs=_request_logs(),
             ),
             500,
         )
@@ -266,35 +529,45 @@ def generate():
 
 @app.route("/process-project", methods=["POST"])
 def process_project():
-    global WEB_APP_LOG_BUFFER
     global PROCESSING_STATUS
 
     # Update processing status
-    with STATUS_LOCK:
-        PROCESSING_STATUS["active"] = True
-        PROCESSING_STATUS["id"] = f"project-{int(time.time())}"
+    PROCESSING_STATUS["state"] = (True, f"project-{time.monotonic_ns()}")
 
-    # Clear the log buffer for this request
-    with WEB_APP_LOG_LOCK:
-        WEB_APP_LOG_BUFFER = []
+    # Collect this request's log lines separately from the shared live buffer
+    _start_request_logs()
 
     # Initialize counts and details
     processed_files_count = 0
     project_files_list = []
+    # Only touched by this request's thread, so it needs no lock
     failed_files_details_map = {}
     current_total_tokens = 0
 
     try:
         web_log(f"WEB_APP: Starting process-project endpoint")
-        ensure_readme_sync_tokenizer_initialized()
+        if _reloader_active():
+            # A README write can trigger a reload and kill in-flight LLM calls
+            web_log("WEB_APP: Refusing project processing while the reloader is active")
+            _set_processing_inactive()
+            return (
+                jsonify(
+                    error="Project processing is disabled while the debug reloader is active. Unset FLASK_DEBUG.",
+                    processed_count=0,
+                    total_files=0,
+                    failed_files={},
+                    total_tokens=0,
+                    logs=_request_logs(),
+                ),
+                409,
+            )
         llm_mode_choice = request.form.get("llm_mode", "2")  # Default to remote (2)
         web_log(f"WEB_APP: Using LLM mode {llm_mode_choice}")
 
         if llm_mode_choice == "2" and not readme_sync.remote_llm.TOGETHER_API_KEY:
             web_log("WEB_APP: Remote LLM mode selected but TOGETHER_API_KEY not set")
             # Update processing status to inactive
-            with STATUS_LOCK:
-                PROCESSING_STATUS["active"] = False
+            _set_processing_inactive()
             return (
                 jsonify(
                     message="Remote LLM mode selected, but TOGETHER_API_KEY is not set.",
@@ -303,328 +576,311 @@ def process_project():
                     total_files=len(project_files_list),
                     failed_files=failed_files_details_map,
                     total_tokens=current_total_tokens,
-                    logs=WEB_APP_LOG_BUFFER[-15:],
+                    logs=_request_logs(),
                 ),
                 500,
             )
 
-        with capture_stderr_globally() as log_buffer:
-            try:
-                web_log(f"WEB_APP: Finding project files to process")
-                project_files_list = get_project_files(ROOT)
-                web_log(f"WEB_APP: Found {len(project_files_list)} files to process")
+        # The run continues on its own thread, so hand it the request log
+        request_logs = _REQUEST_LOGS.get()
+
+        def generate_results():
+            nonlocal processed_files_count, project_files_list, current_total_tokens
+            _REQUEST_LOGS.set(request_logs)
+            with capture_stderr_globally() as log_buffer:
+                try:
+                    web_log(f"WEB_APP: Finding project files to process")
+                    project_entries = get_project_files(ROOT)
+                    project_files_list = [p for p, _ in project_entries]
+                    rel_path_by_file = dict(project_entries)
+                    web_log(
+                        f"WEB_APP: Found {len(project_files_list)} files to process"
+                    )
 
-                if not project_files_list:
-                    web_log("WEB_APP: No files found to process in the project")
-                    # Update processing status to inactive
-                    with STATUS_LOCK:
-                        PROCESSING_STATUS["active"] = False
-                    return (
-                        jsonify(
+                    if not project_files_list:
+                        web_log("WEB_APP: No files found to process in the project")
+                        yield _ndjson_line(
                             message="No files found to process in the project.",
                             processed_count=0,
                             total_files=0,
                             failed_files={},
                             total_tokens=0,
-                            logs=WEB_APP_LOG_BUFFER[-15:],
-                        ),
-                        200,
+                            logs=_request_logs(),
+                        )
+                        return
+
+                    web_log(f"WEB_APP: Performing pre-summarization cleanup.")
+                    readme_sync.cleanup_stale_summaries(project_files_list)
+                    # --- Token counting ---
+                    # The total is only reported, never used to limit the run, so
+                    # count in the background while summarization gets going
+                    token_count_future = None
+                    token_encoding = readme_sync.get_token_encoding()
+                    if token_encoding:
+                        token_count_executor = ThreadPoolExecutor(max_workers=1)
+                        token_count_future = token_count_executor.submit(
+                            _count_project_tokens, token_encoding, project_files_list
+                        )
+                        token_count_executor.shutdown(wait=False)  # Task still runs
+
+                    # Worker pools are created once at startup (see _SUMMARY_EXECUTORS)
+                    if llm_mode_choice == "1":
+                        MAX_WORKERS = LOCAL_MAX_WORKERS
+                        web_log(
+                            f"WEB_APP: Using {MAX_WORKERS} workers for local LLM processing"
+                        )
+                    else:  # llm_mode_choice == "2" (remote)
+                        MAX_WORKERS = REMOTE_MAX_WORKERS
+                        web_log(
+                            f"WEB_APP: Using {MAX_WORKERS} workers for remote LLM processing (from REMOTE_MAX_WORKERS env)"
+                        )
+
+                    print(
+                        f"WEB_APP: Starting summarization for {len(project_files_list)} files using up to {MAX_WORKERS} workers (mode: {llm_mode_choice})...",
+                        file=sys.stderr,
                     )
 
-                # Reset global token count
-                with readme_sync._TOKEN_COUNT_LOCK:
-                    readme_sync._TOTAL_TOKEN_COUNT = 0
-
-                web_log(f"WEB_APP: Performing pre-summarization cleanup.")
-                readme_dirs_to_check = set(p.parent for p in project_files_list)
-                for readme_dir in readme_dirs_to_check:
-                    readme_path = readme_dir / "README.md"
-                    if readme_path.exists() and readme_path.is_file():
-                        try:
-                            current_content = readme_path.read_text(encoding="utf-8")
-                            original_content = current_content
-                            summarized_fnames_in_readme = (
-                                readme_sync._get_summarized_fnames_from_readme(
-                                    current_content
-                                )
-                            )
-                            actual_fnames_in_dir_and_valid = {
-                                f.name
-                                for f in project_files_list
-                                if f.parent == readme_dir
-                            }
-                            fnames_to_remove_summary_for = [
-                                fn
-                                for fn in summarized_fnames_in_readme
-                                if fn not in actual_fnames_in_dir_and_valid
-                            ]
-
-                            if fnames_to_remove_summary_for:
-                                print(
-                                    f"WEB_APP: Pre-cleanup for {readme_path}: Removing summaries for {fnames_to_remove_summary_for}",
-                                    file=sys.stderr,
-                                )
-                                modified_readme_content = current_content
-                                for fname_to_remove in fnames_to_remove_summary_for:
-                                    modified_readme_content = (
-                                        readme_sync._remove_summary_from_readme(
-                                            modified_readme_content, fname_to_remove
-                                        )
+                    # Main processing loop (sequential or parallel); summaries are
+                    # written to their READMEs by a single background writer
+                    with readme_sync.readme_writer() as readme_updates:
+                        if MAX_WORKERS <= 0:
+                            for done_count, path_to_process in enumerate(
+                                project_files_list, 1
+                            ):
+                                try:
+                                    print(
+                                        f"WEB_APP: Processing (sequentially, mode: {llm_mode_choice}): {path_to_process}",
+                                        file=sys.stderr,
                                     )
-                                if modified_readme_content != original_content:
-                                    readme_lock = readme_sync._get_readme_lock(
-                                        readme_path
+                                    md_summary = readme_sync.summarise_file(
+                                        path_to_process, llm_mode_choice
                                     )
-                                    with readme_lock:
-                                        readme_path.write_text(
-                                            modified_readme_content, encoding="utf-8"
+                                    if md_summary and not md_summary.startswith(
+                                        "Error:"
+                                    ):
+                                        readme_updates.put(
+                                            (
+                                                path_to_process.parent / "README.md",
+                                                path_to_process.name,
+                                                md_summary,
+                                            )
                                         )
-                        except Exception as e_cleanup:  # Catch specific cleanup error
-                            print(
-                                f"WEB_APP: Error during pre-summarization cleanup of {readme_path}: {e_cleanup}",
-                                file=sys.stderr,  # Logged to buffer
-                            )
-                # --- Token counting ---
-                if readme_sync._TOKEN_ENCODING:
-                    for p in project_files_list:
-                        try:
-                            content = p.read_text(encoding="utf-8", errors="ignore")
-                            token_count = len(
-                                readme_sync._TOKEN_ENCODING.encode(
-                                    content, disallowed_special=()
-                                )
-                            )
-                            with readme_sync._TOKEN_COUNT_LOCK:
-                                readme_sync._TOTAL_TOKEN_COUNT += token_count
-                        except (
-                            Exception
-                        ) as e_token:  # Catch specific token counting error
-                            print(
-                                f"WEB_APP: Warning: Could not count tokens for {p}: {e_token}",
-                                file=sys.stderr,  # Logged to buffer
-                            )
-                current_total_tokens = readme_sync._TOTAL_TOKEN_COUNT
-                print(
-                    f"WEB_APP: Total estimated tokens for {len(project_files_list)} files: {current_total_tokens}",
-                    file=sys.stderr,
-                )
-
-                # Set MAX_WORKERS based on LLM mode - IMPORTANT FIX
-                if llm_mode_choice == "1":
-                    MAX_WORKERS = int(os.getenv("LOCAL_MAX_WORKERS", "2"))
-                    web_log(
-                        f"WEB_APP: Using {MAX_WORKERS} workers for local LLM processing"
-                    )
-                else:  # llm_mode_choice == "2" (remote)
-                    # Default to 6 workers for remote LLM if not specified
-                    DEFAULT_REMOTE_WORKERS = 6  # Increased from 4 to 6 for better performance with remote LLM
-                    MAX_WORKERS = int(
-                        os.getenv("REMOTE_MAX_WORKERS", str(DEFAULT_REMOTE_WORKERS))
-                    )
-                    web_log(
-                        f"WEB_APP: Using {MAX_WORKERS} workers for remote LLM processing (from REMOTE_MAX_WORKERS env)"
-                    )
-
-                print(
-                    f"WEB_APP: Starting summarization for {len(project_files_list)} files using up to {MAX_WORKERS} workers (mode: {llm_mode_choice})...",
-                    file=sys.stderr,
-                )
-
-                # Main processing loop (sequential or parallel)
-                if MAX_WORKERS <= 0:
-                    for path_to_process in project_files_list:
-                        try:
-                            print(
-                                f"WEB_APP: Processing (sequentially, mode: {llm_mode_choice}): {path_to_process}",
-                                file=sys.stderr,
-                            )
-                            md_summary = readme_sync.summarise_file(
-                                path_to_process, llm_mode_choice
-                            )
-                            if md_summary and not md_summary.startswith("Error:"):
-                                readme_file_path = path_to_process.parent / "README.md"
-                                readme_lock = readme_sync._get_readme_lock(
-                                    readme_file_path
-                                )
-                                with readme_lock:
-                                    readme_sync._inject(
-                                        readme_file_path,
-                                        path_to_process.name,
-                                        md_summary,
+                                        processed_files_count += 1
+                                    else:
+                                        # Failures are only recorded: no README I/O
+                                        # and no locks on this path
+                                        err_msg = (
+                                            md_summary
+                                            or "Unknown error during summarization"
+                                        )
+                                        failed_files_details_map[
+                                            rel_path_by_file[path_to_process]
+                                        ] = err_msg
+                                        print(
+                                            f"WEB_APP: Skipping/Error for {path_to_process.name}: {err_msg[:100]}...",
+                                            file=sys.stderr,
+                                        )
+                                except (
+                                    Exception
+                                ) as exc_seq:  # Error in sequential processing of one file
+                                    err_str = str(exc_seq)
+                                    failed_files_details_map[
+                                        rel_path_by_file[path_to_process]
+                                    ] = err_str
+                                    print(
+                                        f"WEB_APP: Error processing {path_to_process} sequentially: {err_str}",
+                                        file=sys.stderr,
                                     )
-                                processed_files_count += 1
-                            else:
-                                err_msg = (
-                                    md_summary or "Unknown error during summarization"
+                                rel_path = rel_path_by_file[path_to_process]
+                                yield _ndjson_line(
+                                    path=rel_path,
+                                    ok=rel_path not in failed_files_details_map,
+                                    done=done_count,
+                                    total=len(project_files_list),
                                 )
-                                failed_files_details_map[
-                                    str(path_to_process.relative_to(ROOT))
-                                ] = err_msg
+                        else:  # Parallel execution
+                            # Long-lived pool shared by all runs in this mode; it
+                            # only starts threads as tasks need them
+                            executor = _SUMMARY_EXECUTORS[
+                                "1" if llm_mode_choice == "1" else "2"
+                            ]
+                            if (
+                                llm_mode_choice == "1"
+                                and hasattr(readme_sync, "local_llm")
+                                and hasattr(readme_sync.local_llm, "start_preload")
+                            ):
                                 print(
-                                    f"WEB_APP: Skipping/Error for {path_to_process.name}: {err_msg[:100]}...",
+                                    "WEB_APP: Attempting to preload local model...",
                                     file=sys.stderr,
                                 )
-                        except (
-                            Exception
-                        ) as exc_seq:  # Error in sequential processing of one file
-                            err_str = str(exc_seq)
-                            failed_files_details_map[
-                                str(path_to_process.relative_to(ROOT))
-                            ] = err_str
-                            print(
-                                f"WEB_APP: Error processing {path_to_process} sequentially: {err_str}",
-                                file=sys.stderr,
-                            )
-                else:  # Parallel execution
-                    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-                        if (
-                            llm_mode_choice == "1"
-                            and hasattr(readme_sync, "local_llm")
-                            and hasattr(readme_sync.local_llm, "preload_model")
-                        ):
-                            print(
-                                "WEB_APP: Attempting to preload local model...",
-                                file=sys.stderr,
-                            )
-                            preload_future = executor.submit(
-                                readme_sync.local_llm.preload_model
-                            )
-                            try:
-                                if preload_future.result(
-                                    timeout=getattr(
-                                        readme_sync.local_llm,
-                                        "LLM_FIRST_ATTEMPT_TIMEOUT",
-                                        60,
-                                    )
-                                    + 10
-                                ):
+                                # Runs on its own thread, never queued behind
+                                # another run's tasks; None if already loading
+                                # or still warm
+                                preload_future = readme_sync.local_llm.start_preload()
+                                # Don't wait: files are submitted right away and
+                                # their LLM calls block until the preload ends
+                                if preload_future is None:
                                     print(
-                                        "WEB_APP: Local model preloaded successfully or was already loaded.",
+                                        "WEB_APP: Local model is already loaded or loading.",
                                         file=sys.stderr,
                                     )
                                 else:
-                                    print(
-                                        "WEB_APP: Local model preloading failed or indicated model was not ready.",
-                                        file=sys.stderr,
+                                    preload_future.add_done_callback(
+                                        _log_preload_result
                                     )
-                            except Exception as e_preload:
-                                print(
-                                    f"WEB_APP: Error during local model preloading: {e_preload}",
-                                    file=sys.stderr,
-                                )
 
-                        future_to_path = {
-                            executor.submit(
-                                readme_sync.summarise_file, p, llm_mode_choice
-                            ): p
-                            for p in project_files_list
-                        }
-                        for i, future in enumerate(as_completed(future_to_path)):
-                            path_processed = future_to_path[future]
-                            try:
-                                md_summary = future.result()
-                                if md_summary and not md_summary.startswith("Error:"):
-                                    readme_file_path = (
-                                        path_processed.parent / "README.md"
-                                    )
-                                    readme_lock = readme_sync._get_readme_lock(
-                                        readme_file_path
-                                    )
-                                    with readme_lock:
-                                        readme_sync._inject(
-                                            readme_file_path,
-                                            path_processed.name,
-                                            md_summary,
+                            future_to_path = {
+                                executor.submit(
+                                    readme_sync.summarise_file, p, llm_mode_choice
+                                ): p
+                                for p in project_files_list
+                            }
+                            completed_count = 0
+                            pending = set(future_to_path)
+                            while pending:
+                                # Handle every summary that finished together as
+                                # one batch, with a single progress line
+                                done, pending = wait(
+                                    pending, return_when=FIRST_COMPLETED
+                                )
+                                done_names = []
+                                for future in done:
+                                    path_processed = future_to_path[future]
+                                    done_names.append(path_processed.name)
+                                    try:
+                                        md_summary = future.result()
+                                        if md_summary and not md_summary.startswith(
+                                            "Error:"
+                                        ):
+                                            readme_updates.put(
+                                                (
+                                                    path_processed.parent / "README.md",
+                                                    path_processed.name,
+                                                    md_summary,
+                                                )
+                                            )
+                                            processed_files_count += 1
+                                        else:
+                                            # Failures are only recorded: no
+                                            # README I/O and no locks here
+                                            err_msg = (
+                                                md_summary
+                                                or "Unknown error during summarization"
+                                            )
+                                            failed_files_details_map[
+                                                rel_path_by_file[path_processed]
+                                            ] = err_msg
+                                            print(
+                                                f"WEB_APP: Skipping/Error for {path_processed.name}: {err_msg[:100]}...",
+                                                file=sys.stderr,
+                                            )
+                                    except (
+                                        Exception
+                                    ) as exc_parallel_file:  # Error in parallel processing of one file
+                                        err_str = str(exc_parallel_file)
+                                        failed_files_details_map[
+                                            rel_path_by_file[path_processed]
+                                        ] = err_str
+                                        print(
+                                            f"WEB_APP: File {path_processed.name} generated an exception: {err_str}",
+                                            file=sys.stderr,
                                         )
-                                    processed_files_count += 1
-                                else:
-                                    err_msg = (
-                                        md_summary
-                                        or "Unknown error during summarization"
+
+                                completed_count += len(done)
+                                web_log(
+                                    f"WEB_APP: Web processed ({completed_count}/{len(project_files_list)}): {', '.join(sorted(done_names))}. Successes: {processed_files_count}"
+                                )
+                                done_rel_paths = [
+                                    rel_path_by_file[future_to_path[f]] for f in done
+                                ]
+                                yield "".join(
+                                    _ndjson_line(
+                                        path=rel_path,
+                                        ok=rel_path not in failed_files_details_map,
+                                        done=done_count,
+                                        total=len(project_files_list),
                                     )
-                                    failed_files_details_map[
-                                        str(path_processed.relative_to(ROOT))
-                                    ] = err_msg
-                                    print(
-                                        f"WEB_APP: Skipping/Error for {path_processed.name}: {err_msg[:100]}...",
-                                        file=sys.stderr,
+                                    for done_count, rel_path in enumerate(
+                                        done_rel_paths, completed_count - len(done) + 1
                                     )
-                            except (
-                                Exception
-                            ) as exc_parallel_file:  # Error in parallel processing of one file
-                                err_str = str(exc_parallel_file)
-                                failed_files_details_map[
-                                    str(path_processed.relative_to(ROOT))
-                                ] = err_str
-                                print(
-                                    f"WEB_APP: File {path_processed.name} generated an exception: {err_str}",
-                                    file=sys.stderr,
                                 )
 
-                            print(
-                                f"WEB_APP: Web processed ({i+1}/{len(project_files_list)}): {path_processed.name}. Successes: {processed_files_count}",
-                                file=sys.stderr,
-                            )
-
-                current_total_tokens = readme_sync._TOTAL_TOKEN_COUNT
-                result_message = f"Project processing complete. Processed {processed_files_count} of {len(project_files_list)} files successfully."
-                if failed_files_details_map:
+                    # Each run reports its own total, so concurrent runs never mix counts
+                    if token_count_future is not None:
+                        current_total_tokens = token_count_future.result()
+                    print(
+                        f"WEB_APP: Total estimated tokens for {len(project_files_list)} files: {current_total_tokens}",
+                        file=sys.stderr,
+                    )
+                    result_message = f"Project processing complete. Processed {processed_files_count} of {len(project_files_list)} files successfully."
+                    if failed_files_details_map:
+                        result_message += (
+                            f" {len(failed_files_details_map)} file(s) failed."
+                        )
                     result_message += (
-                        f" {len(failed_files_details_map)} file(s) failed."
+                        f" Total tokens estimated: {current_total_tokens}."
                     )
-                result_message += f" Total tokens estimated: {current_total_tokens}."
-                print(f"WEB_APP: {result_message}", file=sys.stderr)
-
-                # Capture the end of processing with web_log
-                web_log(
-                    f"WEB_APP: Processing completed. Processed {processed_files_count} of {len(project_files_list)} files."
-                )
+                    print(f"WEB_APP: {result_message}", file=sys.stderr)
 
-                # Update processing status to inactive at the end
-                with STATUS_LOCK:
-                    PROCESSING_STATUS["active"] = False
-
-                # Use our global log buffer
-                return jsonify(
-                    message=result_message,
-                    processed_count=processed_files_count,
-                    total_files=len(project_files_list),
-                    failed_files=failed_files_details_map,
-                    total_tokens=current_total_tokens,
-                    logs=WEB_APP_LOG_BUFFER[-15:],
-                )
-
-            except Exception as inner_e:
-                # Update processing status to inactive
-                with STATUS_LOCK:
-                    PROCESSING_STATUS["active"] = False
+                    # Capture the end of processing with web_log
+                    web_log(
+                        f"WEB_APP: Processing completed. Processed {processed_files_count} of {len(project_files_list)} files."
+                    )
 
-                web_log(f"WEB_APP: Exception during project processing: {inner_e}")
-                import traceback
+                    # The summary goes last, after every per-file line
+                    yield _ndjson_line(
+                        message=result_message,
+                        processed_count=processed_files_count,
+                        total_files=len(project_files_list),
+                        failed_files=failed_files_details_map,
+                        total_tokens=current_total_tokens,
+                        logs=_request_logs(),
+                    )
 
-                tb_str = traceback.format_exc()
-                web_log(f"WEB_APP: Traceback: {tb_str}")
+                except Exception as inner_e:
+                    web_log(f"WEB_APP: Exception during project processing: {inner_e}")
+                    tb_str = traceback.format_exc()
+                    web_log(f"WEB_APP: Traceback: {tb_str}")
 
-                return (
-                    jsonify(
+                    # Headers are already sent, so the error rides in the last line
+                    yield _ndjson_line(
                         error=f"Server error: {str(inner_e)}",
                         processed_count=processed_files_count,
                         total_files=len(project_files_list),
                         failed_files=failed_files_details_map,
                         total_tokens=current_total_tokens,
-                        logs=WEB_APP_LOG_BUFFER[-15:],
-                    ),
-                    500,
-                )
+                        logs=_request_logs(),
+                    )
+                finally:
+                    # Only once the run itself is over, whatever the client did
+                    _set_processing_inactive()
+
+        results = queue.SimpleQueue()
+
+        def run_project():
+            # Drive the run to completion independently of the response, so a
+            # client that disconnects doesn't cut it short: every summary is
+            # still written and no LLM call is wasted
+            try:
+                for line in generate_results():
+                    results.put(line)
+            finally:
+                results.put(None)
+
+        threading.Thread(target=run_project, name="process-project").start()
+
+        def stream_results():
+            # Only observes the run; closing it leaves the run untouched
+            while (line := results.get()) is not None:
+                yield line
+
+        return Response(stream_results(), mimetype="application/x-ndjson")
 
     except Exception as outer_e:
         # Update processing status to inactive
-        with STATUS_LOCK:
-            PROCESSING_STATUS["active"] = False
+        _set_processing_inactive()
 
         web_log(f"WEB_APP: Critical error in process-project: {outer_e}")
-        import traceback
-
         tb_str = traceback.format_exc()
         web_log(f"WEB_APP: Traceback: {tb_str}")
 
@@ -635,7 +891,7 @@ def process_project():
                 total_files=len(project_files_list),
                 failed_files={},
                 total_tokens=current_total_tokens,
-                logs=WEB_APP_LOG_BUFFER[-15:],
+                logs=_request_logs(),
             ),
             500,
         )
@@ -646,32 +902,83 @@ def log_stream():
     """Stream logs as server-sent events."""
 
     def generate():
-        last_idx = 0
-        yield 'data: {"status": "connected", "message": "Log stream connected"}\n\n'
-
-        while True:
-            with WEB_APP_LOG_LOCK:
-                if last_idx < len(WEB_APP_LOG_BUFFER):
-                    # Get new logs since last check
-                    new_logs = WEB_APP_LOG_BUFFER[last_idx:]
-                    last_idx = len(WEB_APP_LOG_BUFFER)
+        last_seen = 0  # Sequence number of the last line sent to this client
+        try:
+            yield 'data: {"status": "connected", "message": "Log stream connected"}\n\n'
+
+            while not _SHUTDOWN_EVENT.is_set():
+                data = None
+                new_logs = []
+                with _LOG_COND:
+                    # Sleep until web_log() appends something (or shutdown)
+                    woken = _LOG_COND.wait_for(
+                        lambda: _LOG_SEQ > last_seen or _SHUTDOWN_EVENT.is_set(),
+                        timeout=SSE_KEEPALIVE_SECONDS,
+                    )
+                if woken:
+                    # Let a burst of lines accumulate so it goes out as one frame
+                    _SHUTDOWN_EVENT.wait(SSE_COALESCE_SECONDS)
+                with WEB_APP_LOG_LOCK:
+                    newest = _LOG_SEQ
+                    # The buffer always holds the most recent, contiguous
+                    # sequence numbers, so the unseen lines are its trailing
+                    # (newest - last_seen) entries (fewer if evicted); copy
+                    # just those, newest first, to keep the lock hold short
+                    unseen = list(
+                        islice(reversed(WEB_APP_LOG_BUFFER), newest - last_seen)
+                    )
+                if newest > last_seen:
+                    new_logs = [msg for _, msg in reversed(unseen)]
+                    last_seen = newest
 
+                if new_logs:
                     # Process status info
-                    with STATUS_LOCK:
-                        status_data = {
-                            "active": PROCESSING_STATUS["active"],
-                            "id": PROCESSING_STATUS["id"],
-                        }
-
-                    # Send the new logs and status
+                    active, status_id = PROCESSING_STATUS["state"]
+                    status_data = {"active": active, "id": status_id}
                     data = {"logs": new_logs, "status": status_data}
-                    yield f"data: {json.dumps(data)}\n\n"
 
-            # Check again after a short delay
-            time.sleep(0.5)
+                # Send the new logs and status, or a comment line when idle so
+                # a vanished client is noticed on the next write
+                if data is not None:
+                    yield f"data: {orjson.dumps(data).decode()}\n\n"
+                elif not _SHUTDOWN_EVENT.is_set():
+                    yield ": keep-alive\n\n"
+        except (GeneratorExit, BrokenPipeError, ConnectionResetError):
+            # Client disconnected; stop so the server can reclaim the thread
+            return
+
+    return Response(stream_with_context(generate()), mimetype="text/event-stream")
 
-    return Response(generate(), mimetype="text/event-stream")
+
+def _reloader_active():
+    """True when running in the Werkzeug reloader child (FLASK_DEBUG=1)."""
+    return app.debug and os.environ.get("WERKZEUG_RUN_MAIN") == "true"
+
+
+def serve():
+    """Run the app under waitress; use the Flask dev server only with FLASK_DEBUG=1.
+
+    For production, prefer e.g.: gunicorn -k gthread --threads 16 --workers 1 web_app:app
+    (Not asgiref's WsgiToAsgi: it runs every WSGI call on one shared thread, so
+    an open /log-stream would block all other requests.)
+    """
+    host = os.getenv("WEB_HOST", "0.0.0.0")
+    port = int(os.getenv("WEB_PORT", "5003"))
+    # Shut the pools down as the server stops; by the time atexit hooks run,
+    # concurrent.futures has already waited for every queued summary
+    try:
+        if os.getenv("FLASK_DEBUG") == "1":
+            app.run(debug=True, host=host, port=port)
+            return
+
+        from waitress import serve as waitress_serve
+
+        waitress_serve(
+            app, host=host, port=port, threads=int(os.getenv("WEB_THREADS", "16"))
+        )
+    finally:
+        _shutdown_summary_executors()
 
 
 if __name__ == "__main__":
-    app.run(debug=True, host="0.0.0.0", port=5003)
+    serve()